@@ -3,6 +3,11 @@ The radio astronomy delay_wideband_prog module is parameterized by the number of
 """
 
 import numpy as np
+import os
+from runpy import run_path
+
+# common_pkg_py (not installed, so run from its file) formats the two vector files
+common_pkg_py = run_path(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../common_pkg", "common_pkg_py", "__init__.py"))
 
 def delay_wideband_prog_model(simultaneous_input_bits, delay_cycles):
     """
@@ -34,17 +39,11 @@ def delay_wideband_prog_model(simultaneous_input_bits, delay_cycles):
 
     # Write only nof_values/wideband_factor lines to file. Columns are nof_values/wideband_factor long and there are nof_streams*wideband_factor columns
     input_filename = f"delay_input_{nof_streams}_{delay_cycles}.dat"
-    with open(input_filename, 'w') as f:
-        for i in range(input_len):
-            i_dat = input_data[i,:]
-            f.write(','.join(map(str, i_dat)) + '\n')
+    common_pkg_py["write_int_text"](input_filename, input_data[:input_len,:], delimiter=',')
 
     # Write output data to file. Rows are 500 + delay_cycles long, columns are nof_streams long and values are comma separated
     output_filename = f"delay_output_{nof_streams}_{delay_cycles}.dat"
-    with open(output_filename, 'w') as f:
-        for i in range(output_data.shape[0]):
-            o_dat = output_data[i,:]
-            f.write(','.join(map(str, o_dat)) + '\n')
+    common_pkg_py["write_int_text"](output_filename, output_data, delimiter=',')
 
     return input_filename, output_filename
 
@@ -1,9 +1,20 @@
 from vunit import VUnit, VUnitCLI
 from vunit.sim_if.factory import SIMULATOR_FACTORY
 from os.path import join, abspath, split,realpath,dirname
-from importlib.machinery import SourceFileLoader
-# load the r2sdf fix point accurate model from r2sdf module.
-r2sdf_fft_py = SourceFileLoader("r2sdf_fft_py",f"{realpath(dirname(__file__))}/../r2sdf_fft/r2sdf_fft_py/__init__.py").load_module()
+import sys
+import importlib.util
+# load the r2sdf fix point accurate model and testbench generation from the r2sdf module, and the
+# fft_r2_wide model built on it, from their files the way wb_fft_py loads fft_model (sys.path is left
+# alone). They are registered as packages under their own names, so the pool workers of the models
+# (forked) and wb_fft_py find the same modules.
+def load_package(name,init_file):
+    spec = importlib.util.spec_from_file_location(name,init_file,submodule_search_locations=[dirname(init_file)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+r2sdf_fft_py = load_package("r2sdf_fft_py",realpath(join(dirname(__file__),"../r2sdf_fft/r2sdf_fft_py/__init__.py")))
+wb_fft_py = load_package("wb_fft_py",realpath(join(dirname(__file__),"wb_fft_py/__init__.py")))
 import numpy as np
 
 def tb_vu_wb_fft_vfmodel_setup(ui):
@@ -14,12 +25,16 @@ def tb_vu_wb_fft_vfmodel_setup(ui):
     out_dat_w = 18
     stage_dat_w = 18
     guard_w = 0
+    use_fft_shift = False
+    out_gain_w = 0
+    guard_enable = True
     twiddle_width = 18
     fftsize_log2 = 13
     
     do_rounding = 1
     do_saturation = 1
     enable_pattern = 2 #every other clock
+    binary_io = True # raw int32 input/output files, False for the text files
     # Decode some of those for VHDL
     if do_rounding==1:
         use_round = "ROUND"
@@ -45,30 +60,18 @@ def tb_vu_wb_fft_vfmodel_setup(ui):
     #data = data + noise
     data = r2sdf_fft_py.roundsat(data,1,in_dat_w,0,1,1,1)
 
-    enable_pattern = 0
-    testbench.add_config(
-        pre_config=r2sdf_fft_py.make_fft_preconfig(fftsize_log2,in_dat_w,scale_sched,data),
-        post_check=r2sdf_fft_py.make_fft_postcheck(use_reorder,in_dat_w,out_dat_w,stage_dat_w,guard_w,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched),
-        name=f"FFTWIDE_E0_s{fftsize_log2}_reorder{use_reorder}_din{in_dat_w}_dout{out_dat_w}_stagew{stage_dat_w}_guardw{guard_w}_doround{do_rounding}_dosaturation{do_saturation}_scale{scale_sched}",
-        generics=dict(g_use_reorder=use_reorder,g_in_dat_w=in_dat_w,g_out_dat_w=out_dat_w,g_stage_dat_w=stage_dat_w,g_guard_w=guard_w,g_twiddle_width=twiddle_width,g_fftsize_log2=fftsize_log2,g_ovflw_behav=ovflw_behav,g_use_round=use_round,g_use_mult_round=use_mult_round,g_enable_pattern=enable_pattern))
-    enable_pattern = 1
-    testbench.add_config(
-        pre_config=r2sdf_fft_py.make_fft_preconfig(fftsize_log2,in_dat_w,scale_sched,data),
-        post_check=r2sdf_fft_py.make_fft_postcheck(use_reorder,in_dat_w,out_dat_w,stage_dat_w,guard_w,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched),
-        name=f"FFTWIDE_Erandom_s{fftsize_log2}_reorder{use_reorder}_din{in_dat_w}_dout{out_dat_w}_stagew{stage_dat_w}_guardw{guard_w}_doround{do_rounding}_dosaturation{do_saturation}_scale{scale_sched}",
-        generics=dict(g_use_reorder=use_reorder,g_in_dat_w=in_dat_w,g_out_dat_w=out_dat_w,g_stage_dat_w=stage_dat_w,g_guard_w=guard_w,g_twiddle_width=twiddle_width,g_fftsize_log2=fftsize_log2,g_ovflw_behav=ovflw_behav,g_use_round=use_round,g_use_mult_round=use_mult_round,g_enable_pattern=enable_pattern))
-    enable_pattern = 2
-    testbench.add_config(
-        pre_config=r2sdf_fft_py.make_fft_preconfig(fftsize_log2,in_dat_w,scale_sched,data),
-        post_check=r2sdf_fft_py.make_fft_postcheck(use_reorder,in_dat_w,out_dat_w,stage_dat_w,guard_w,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched),
-        name=f"FFTWIDE_E10Clocks_s{fftsize_log2}_reorder{use_reorder}_din{in_dat_w}_dout{out_dat_w}_stagew{stage_dat_w}_guardw{guard_w}_doround{do_rounding}_dosaturation{do_saturation}_scale{scale_sched}",
-        generics=dict(g_use_reorder=use_reorder,g_in_dat_w=in_dat_w,g_out_dat_w=out_dat_w,g_stage_dat_w=stage_dat_w,g_guard_w=guard_w,g_twiddle_width=twiddle_width,g_fftsize_log2=fftsize_log2,g_ovflw_behav=ovflw_behav,g_use_round=use_round,g_use_mult_round=use_mult_round,g_enable_pattern=enable_pattern))
-    enable_pattern = 3
-    testbench.add_config(
-        pre_config=r2sdf_fft_py.make_fft_preconfig(fftsize_log2,in_dat_w,scale_sched,data),
-        post_check=r2sdf_fft_py.make_fft_postcheck(use_reorder,in_dat_w,out_dat_w,stage_dat_w,guard_w,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched),
-        name=f"FFTWIDE_E100Clocks_s{fftsize_log2}_reorder{use_reorder}_din{in_dat_w}_dout{out_dat_w}_stagew{stage_dat_w}_guardw{guard_w}_doround{do_rounding}_dosaturation{do_saturation}_scale{scale_sched}",
-        generics=dict(g_use_reorder=use_reorder,g_in_dat_w=in_dat_w,g_out_dat_w=out_dat_w,g_stage_dat_w=stage_dat_w,g_guard_w=guard_w,g_twiddle_width=twiddle_width,g_fftsize_log2=fftsize_log2,g_ovflw_behav=ovflw_behav,g_use_round=use_round,g_use_mult_round=use_mult_round,g_enable_pattern=enable_pattern))
+    def add_wide_config(pattern_name,enable_pattern,wb_factor):
+        testbench.add_config(
+            pre_config=r2sdf_fft_py.make_fft_preconfig(fftsize_log2,in_dat_w,scale_sched,data,wb_fft_py.make_wb_fft_golden(wb_factor,use_reorder,use_fft_shift,in_dat_w,out_dat_w,out_gain_w,stage_dat_w,guard_w,guard_enable,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched),binary_io=binary_io),
+            post_check=wb_fft_py.make_wb_fft_postcheck(wb_factor,use_reorder,use_fft_shift,in_dat_w,out_dat_w,out_gain_w,stage_dat_w,guard_w,guard_enable,twiddle_width,fftsize_log2,do_rounding,do_saturation,scale_sched,binary_io=binary_io),
+            name=f"FFTWIDE_{pattern_name}_wb{wb_factor}_s{fftsize_log2}_reorder{use_reorder}_din{in_dat_w}_dout{out_dat_w}_stagew{stage_dat_w}_guardw{guard_w}_doround{do_rounding}_dosaturation{do_saturation}_scale{scale_sched}",
+            generics=dict(g_use_reorder=use_reorder,g_in_dat_w=in_dat_w,g_out_dat_w=out_dat_w,g_stage_dat_w=stage_dat_w,g_guard_w=guard_w,g_twiddle_width=twiddle_width,g_fftsize_log2=fftsize_log2,g_ovflw_behav=ovflw_behav,g_use_round=use_round,g_use_mult_round=use_mult_round,g_enable_pattern=enable_pattern,g_binary_io=binary_io,g_wb_factor=wb_factor))
+
+    # every enable pattern at wb_factor 16, the other wideband factors of the wide model at full speed
+    for pattern_name,enable_pattern in (("E0",0),("Erandom",1),("E10Clocks",2),("E100Clocks",3)):
+        add_wide_config(pattern_name,enable_pattern,16)
+    for wb_factor in (4,8):
+        add_wide_config("E0",0,wb_factor)
         
 
 
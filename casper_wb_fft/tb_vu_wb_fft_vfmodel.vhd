@@ -28,6 +28,8 @@ entity tb_vu_wb_fft_vfmodel is
         g_use_round         : string                    := "ROUND"; --! = "ROUND" or "TRUNCATE" will default to TRUNCATE if invalid option used
         g_use_mult_round    : string                    := "ROUND";		--! Rounding behaviour "ROUND" or "TRUNCATE"
         g_enable_pattern    : integer                   := 0; --0=Full speed, 1=Random, 2=10 Clocks between enables, 3=100 Clock between enables
+        g_binary_io         : boolean                   := false; -- TRUE = input_data.bin/output_data.bin (raw int32), FALSE = .txt
+        g_wb_factor         : integer                   := 16;    -- parallel input/output lanes of fft_r2_wide
         
         -- generics for rTwoSDF
         runner_cfg : string;
@@ -39,12 +41,13 @@ end tb_vu_wb_fft_vfmodel;
 
 architecture tb_vu_wb_fft_vfmodel_arch of tb_vu_wb_fft_vfmodel is
 constant c_fftsize          : integer := 2**g_fftsize_log2;
+type t_int_file is file of integer; -- raw 32 bit words, native byte order
 constant c_fft_test : t_fft :=  (
                                   use_reorder         => g_use_reorder, 
                                   use_fft_shift       => false, 
                                   use_separate        => false,  -- we'll actually use seperate on ngVLA but let's start with complex 
                                   nof_chan            => 0, 
-                                  wb_factor           => 16, 
+                                  wb_factor           => g_wb_factor, 
                                   nof_points          => c_fftsize, 
                                   in_dat_w            => g_in_dat_w, 
                                   out_dat_w           => g_out_dat_w, 
@@ -130,6 +133,7 @@ fft_r2_wide_inst : entity wb_fft_lib.fft_r2_wide
     --variable twidQR             : REAL;
     variable line_var           : line;
     file text_file              : text;
+    file bin_file               : t_int_file;
     --file textR_file             : text;
     variable temp_number        : integer;
     variable fftsize            : integer;
@@ -160,6 +164,24 @@ fft_r2_wide_inst : entity wb_fft_lib.fft_r2_wide
           null; -- no clocks between enables!
       end case;
     end procedure enable_pattern;      
+    -- one word of the input file, one integer per line or one 32 bit word for g_binary_io
+    procedure read_word(variable value : out integer) is
+    begin
+      if g_binary_io then
+        read(bin_file,value);
+      else
+        readline(text_file,line_var);
+        read(line_var,value);
+      end if;
+    end procedure read_word;
+    impure function end_of_input return boolean is
+    begin
+      if g_binary_io then
+        return endfile(bin_file);
+      else
+        return endfile(text_file);
+      end if;
+    end function end_of_input;
   BEGIN
     test_runner_setup(runner, runner_cfg);
     rst     <= '1';
@@ -202,8 +224,12 @@ fft_r2_wide_inst : entity wb_fft_lib.fft_r2_wide
     wait until rising_edge(clk);
     wait until rising_edge(clk);
     wait until rising_edge(clk);
-    file_open(text_file,output_path & "/" & "input_data.txt",READ_MODE);
-    -- The input data, input_data.txt, has the following format
+    if g_binary_io then
+      file_open(bin_file,output_path & "/" & "input_data.bin",READ_MODE);
+    else
+      file_open(text_file,output_path & "/" & "input_data.txt",READ_MODE);
+    end if;
+    -- The input data, input_data.txt or input_data.bin, has the following format
     -- header (first 8 integers):
     -- <fftsize>
     -- <g_in_dat_w>
@@ -215,49 +241,42 @@ fft_r2_wide_inst : entity wb_fft_lib.fft_r2_wide
     -- 2122219905 (Magic Header End field 0x7E7E8181)
     -- folllowed 2*num_words_to_read integers.
     -- Data is in I first, then Q
+    -- input_data.bin holds the same integers as raw 32 bit words
     
     -- Read the Header into VHDL
     -- Word 0= FFTsize
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=c_fftsize,"tb_vu_rtwosdf_vfmodel: Unexpected FFTsize in input data");
     -- Word 1= g_in_dat_w (bits of data for each I and Q)
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=g_in_dat_w,"tb_vu_rtwosdf_vfmodel: Unexpected Input Data width");
     check(temp_number<=32,"tb_vu_rtwosdf_vfmodel: Testbench only supports 32 bit or less inputs!");
     -- Word 2= num_words_to_read (number of I/Q pairs
-    readline(text_file,line_var);
-    read(line_var,words_expected);
+    read_word(words_expected);
     check(words_expected>0,"tb_vu_rtwosdf_vfmodel: Data Length must be greater than 0");
     check((words_expected mod c_fftsize)=0,"tb_vu_rtwosdf_vfmodel: Length of data must be a multiple of FFTsize");
     words_expected_sig <= words_expected;
     -- word 3 = Scale Schedule
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     shiftreg  <= std_logic_vector(to_unsigned(temp_number,g_fftsize_log2));
     
     for n in 4 to 6 loop
         -- Read in the spare fields and verify = 0
-        readline(text_file,line_var);
-        read(line_var,temp_number);
+        read_word(temp_number);
         check(temp_number=0,"tb_vu_rtwosdf_vfmodel: Spare header fields must be 0");
     end loop;
     -- Word=7 Read in the magic word
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=2122219905,"tb_vu_rtwosdf_vfmodel: Magic word must be 0x7E7E8181");
 
     -- Read The Data
     num_words_to_read := words_expected;
     loop
-      exit when endfile(text_file);
+      exit when end_of_input;
       for widx in 0 to (c_fft_test.wb_factor-1) loop
-        readline(text_file,line_var);
-        read(line_var,temp_number);
+        read_word(temp_number);
         dataI             := to_signed(temp_number,g_in_dat_w);
-        readline(text_file,line_var);
-        read(line_var,temp_number);
+        read_word(temp_number);
         dataQ             := to_signed(temp_number,g_in_dat_w);
         in_val            <= '1';
         in_re(widx)       <= std_logic_vector(resize(dataI,44));
@@ -299,29 +318,53 @@ fft_r2_wide_inst : entity wb_fft_lib.fft_r2_wide
   o_data_proc : process
   variable line_var           : line;
   file output_file            : text;
-  variable temp_number        : integer;
+  file output_bin             : t_int_file;
   variable data_cntV          : integer;
+  procedure write_word(value : integer) is
+  begin
+    if g_binary_io then
+      write(output_bin,value);
+    else
+      write(line_var,value);
+      writeline(output_file,line_var);
+    end if;
+  end procedure write_word;
   begin
     data_cnt          <= 1; -- Reset our Data counter
     data_cntV         := 1;
     wait until rising_edge(clk) and rst='0';
-    file_open(output_file,output_path & "/" & "output_data.txt",WRITE_MODE);
+    if g_binary_io then
+      file_open(output_bin,output_path & "/" & "output_data.bin",WRITE_MODE);
+    else
+      file_open(output_file,output_path & "/" & "output_data.txt",WRITE_MODE);
+    end if;
     loop
       exit when endsim='1';
       wait until falling_edge(clk) and out_val='1'; -- read data on falling clocks to avoid delta issues.
+      if g_binary_io and data_cntV=1 then
+        -- output_data.bin gets the input header layout, the input header has been read by the first output
+        write_word(c_fftsize);
+        write_word(g_out_dat_w);
+        write_word(words_expected_sig);
+        write_word(to_integer(unsigned(shiftreg)));
+        for n in 4 to 6 loop
+          write_word(0);
+        end loop;
+        write_word(2122219905);
+      end if;
       for widx in 0 to (c_fft_test.wb_factor-1) loop
-        temp_number     := to_integer(signed(out_re(widx)));
-        write(line_var,temp_number);
-        writeline(output_file,line_var);
-        temp_number     := to_integer(signed(out_im(widx)));
-        write(line_var,temp_number);
-        writeline(output_file,line_var);
+        write_word(to_integer(signed(out_re(widx))));
+        write_word(to_integer(signed(out_im(widx))));
         data_cntV        := data_cntV + 1;
       end loop;
       data_cnt           <= data_cntV;
       exit when data_cntV>=words_expected_sig;
     end loop;
-    file_close(output_file);
+    if g_binary_io then
+      file_close(output_bin);
+    else
+      file_close(output_file);
+    end if;
     wait;
   end process o_data_proc;
 
@@ -0,0 +1,103 @@
+#-------------------------------------
+#-- Text vector files for the VHDL testbenches and memory initialisation files (.txt/.dat/.mem/.mif).
+#-- The integers are formatted with numpy for a whole block of rows at a time: every value becomes a
+#-- row of digit characters, right aligned in a fixed width character array, and the unused leading
+#-- characters are masked out when the block is flattened to bytes. No per value Python formatting.
+#-------------------------------------
+import numpy as np
+import io
+
+_HEX_CHARS = np.frombuffer(b"0123456789abcdef",dtype=np.uint8)
+
+def _int_chars(values,radix,nof_digits):
+    # values (1D int) -> chars (n x width uint8),keep (n x width bool or None when every char is kept)
+    # radix 10: minus sign for negatives, at least nof_digits digits (zero padded, sign not counted).
+    # radix 16: nof_digits>0 gives exactly nof_digits lowercase digits of the two's complement value,
+    # nof_digits=0 the minimum number of digits (values must be >= 0).
+    values = np.asarray(values).astype(np.int64,copy=False)
+    n = values.size
+    if radix==16:
+        if nof_digits>0:
+            ndig = nof_digits
+            mag = values.astype(np.uint64)
+            if ndig<16:
+                mag &= np.uint64((1<<(4*ndig))-1)
+        else:
+            if n>0 and values.min()<0:
+                raise ValueError('negative values need a fixed number of hex digits (nof_digits)')
+            mag = values.astype(np.uint64)
+            ndig = max(1,(int(mag.max()).bit_length()+3)//4) if n>0 else 1
+        shifts = np.uint64(4)*np.arange(ndig-1,-1,-1,dtype=np.uint64)
+        chars = _HEX_CHARS[(mag[:,None] >> shifts) & np.uint64(15)]
+        if nof_digits>0:
+            return chars,None
+        nof_sig = 1+(mag[:,None] >= (np.uint64(1) << (shifts[:-1]))).sum(axis=1)
+        return chars,np.arange(ndig)>=(ndig-nof_sig)[:,None]
+    if radix!=10:
+        raise ValueError('radix must be 10 or 16')
+    neg = values<0
+    mag = np.abs(values).astype(np.uint64) # the int64 minimum wraps to 2**63, which is right as uint64
+    ndig = max(1,nof_digits,len(str(int(mag.max()))) if n>0 else 1)
+    pow10 = np.uint64(10)**np.arange(ndig-1,-1,-1,dtype=np.uint64)
+    chars = ((mag[:,None]//pow10) % np.uint64(10)).astype(np.uint8)
+    chars += ord('0')
+    nof_sig = np.maximum(nof_digits,1+(mag[:,None] >= pow10[:-1]).sum(axis=1))
+    keep = np.arange(ndig)>=(ndig-nof_sig)[:,None]
+    if neg.any():
+        sign = np.full((n,1),ord('-'),dtype=np.uint8)
+        chars = np.concatenate((sign,chars),axis=1)
+        keep = np.concatenate((neg[:,None],keep),axis=1)
+    return chars,keep
+
+def _per_column(value,nof_columns):
+    if np.ndim(value)==0:
+        return [value]*nof_columns
+    if len(value)!=nof_columns:
+        raise ValueError('expected one setting per column (%d)' % nof_columns)
+    return list(value)
+
+def int_text(data,radix=10,nof_digits=0,delimiter=',',line_prefix='',line_end='\n'):
+    # Format the integers in data as bytes, one row per line: line_prefix, the columns separated by
+    # delimiter and line_end. A 1D data is one value per line. radix and nof_digits are as for
+    # _int_chars, a sequence gives one per column (eg a hex address next to a fixed width hex value).
+    data = np.asarray(data)
+    if data.ndim==1:
+        data = data[:,None]
+    nof_rows,nof_columns = data.shape
+    radix = _per_column(radix,nof_columns)
+    nof_digits = _per_column(nof_digits,nof_columns)
+    chars = []
+    keep = []
+    def add_const(text):
+        if text:
+            b = np.frombuffer(text.encode('ascii'),dtype=np.uint8)
+            chars.append(np.broadcast_to(b,(nof_rows,b.size)))
+            keep.append(None)
+    add_const(line_prefix)
+    for col in range(nof_columns):
+        if col>0:
+            add_const(delimiter)
+        col_chars,col_keep = _int_chars(data[:,col],radix[col],nof_digits[col])
+        chars.append(col_chars)
+        keep.append(col_keep)
+    add_const(line_end)
+    if nof_rows==0:
+        return b""
+    if all(k is None for k in keep):
+        return np.concatenate(chars,axis=1).tobytes()
+    keep = [np.ones(c.shape,dtype=bool) if k is None else k for c,k in zip(chars,keep)]
+    return np.concatenate(chars,axis=1)[np.concatenate(keep,axis=1)].tobytes()
+
+def write_int_text(file,data,radix=10,nof_digits=0,delimiter=',',line_prefix='',line_end='\n',rows_per_block=65536):
+    # Write int_text(data,...) to file, a path (overwritten) or an open file (text or binary, eg
+    # after a .mif header). Formatted rows_per_block rows at a time to bound the memory use.
+    if isinstance(file,(str,bytes)) or hasattr(file,'__fspath__'):
+        with open(file,'wb') as f:
+            write_int_text(f,data,radix,nof_digits,delimiter,line_prefix,line_end,rows_per_block)
+        return
+    write = file.write
+    if isinstance(file,io.TextIOBase):
+        write = lambda b: file.write(b.decode('ascii'))
+    data = np.asarray(data)
+    for start in range(0,data.shape[0],rows_per_block):
+        write(int_text(data[start:start+rows_per_block],radix,nof_digits,delimiter,line_prefix,line_end))
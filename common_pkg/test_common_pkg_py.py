@@ -0,0 +1,66 @@
+#-------------------------------------
+#-- pytest checks of the common_pkg_py text writer against np.savetxt and Python formatting
+#-------------------------------------
+import io
+import numpy as np
+import pytest
+import common_pkg_py
+
+def make_values(seed,size=1000):
+    # every digit count, zero, both signs and the int32/int64 extremes
+    rng = np.random.default_rng(seed)
+    values = np.concatenate((rng.integers(-2**31,2**31,size),10**np.arange(0,19),10**np.arange(0,19)-1,-10**np.arange(0,19),
+                             [0,np.iinfo(np.int32).min,np.iinfo(np.int32).max,np.iinfo(np.int64).min,np.iinfo(np.int64).max]))
+    return values.astype(np.int64)
+
+def savetxt_bytes(data,**kwargs):
+    f = io.BytesIO()
+    np.savetxt(f,data,**kwargs)
+    return f.getvalue()
+
+def test_int_text_matches_savetxt():
+    values = make_values(0)
+    assert common_pkg_py.int_text(values)==savetxt_bytes(values,fmt='%d')
+    rows = values[0:1000].reshape(-1,4)
+    assert common_pkg_py.int_text(rows)==savetxt_bytes(rows,fmt='%d',delimiter=',')
+    expected = "".join("(" + " ".join(str(v) for v in row) + ")\n" for row in rows)
+    assert common_pkg_py.int_text(rows,delimiter=' ',line_prefix='(',line_end=')\n')==expected.encode('ascii')
+
+@pytest.mark.parametrize("nof_digits",[0,1,3,12])
+def test_int_text_decimal_digits(nof_digits):
+    values = make_values(1)
+    expected = "".join("%0*d\n" % (nof_digits,v) if v>=0 else "-%0*d\n" % (nof_digits,-int(v)) for v in values)
+    assert common_pkg_py.int_text(values,nof_digits=nof_digits)==expected.encode('ascii')
+
+@pytest.mark.parametrize("nof_digits",[1,4,8,16])
+def test_int_text_hex_twos_complement(nof_digits):
+    values = make_values(2)
+    expected = "".join("%0*x\n" % (nof_digits,int(v) & ((1<<(4*nof_digits))-1)) for v in values)
+    assert common_pkg_py.int_text(values,radix=16,nof_digits=nof_digits)==expected.encode('ascii')
+
+def test_int_text_hex_minimum_digits():
+    values = np.abs(make_values(3)[0:-2])
+    assert common_pkg_py.int_text(values,radix=16)=="".join("%x\n" % v for v in values).encode('ascii')
+    with pytest.raises(ValueError):
+        common_pkg_py.int_text(np.array([1,-1]),radix=16)
+
+def test_int_text_columns():
+    # mif style lines, a hex address next to a fixed width value, with per column radix and digits
+    data = np.stack((np.arange(0,300),np.arange(-150,150)),axis=1)
+    text = common_pkg_py.int_text(data,radix=(16,10),nof_digits=(3,0),delimiter=' : ',line_prefix='  ',line_end=';\n')
+    assert text=="".join("  %03x : %d;\n" % (a,v) for a,v in data).encode('ascii')
+    assert common_pkg_py.int_text(np.zeros((0,2),dtype=int))==b""
+
+def test_write_int_text_files(tmp_path):
+    values = make_values(4).reshape(-1,2)
+    expected = savetxt_bytes(values,fmt='%d',delimiter=',')
+    common_pkg_py.write_int_text(tmp_path/"path.txt",values,rows_per_block=7)
+    assert (tmp_path/"path.txt").read_bytes()==expected
+    with open(tmp_path/"binary.txt","wb") as f:
+        f.write(b"header\n")
+        common_pkg_py.write_int_text(f,values,rows_per_block=100)
+    assert (tmp_path/"binary.txt").read_bytes()==b"header\n"+expected
+    with open(tmp_path/"text.txt","w") as f:
+        f.write("header\n")
+        common_pkg_py.write_int_text(f,values)
+    assert (tmp_path/"text.txt").read_bytes()==b"header\n"+expected
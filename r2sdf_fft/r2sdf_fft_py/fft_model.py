@@ -0,0 +1,1389 @@
+#------------------------------------- 
+#-- Fixed point model of the FFT, plain numpy with no VUnit dependency.
+#-- r2sdf_fft_py re-exports it together with the testbench generation.
+#-------------------------------------
+#--Author	: M. Schiller (NRAO)
+#--Date    : 23-March-2023
+#
+#--------------------------------------------------------------------------------
+#-- Copyright NRAO March 23, 2023
+#--------------------------------------------------------------------------------
+#-- License
+#-- Licensed under the Apache License, Version 2.0 (the "License");
+#-- you may not use this file except in compliance with the License.
+#-- You may obtain a copy of the License at
+#-- 
+#--     http://www.apache.org/licenses/LICENSE-2.0
+#-- 
+#-- Unless required by applicable law or agreed to in writing, software
+#-- distributed under the License is distributed on an "AS IS" BASIS,
+#-- WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#-- See the License for the specific language governing permissions and
+#-- limitations under the License.
+#--
+import numpy as np
+from pathlib import Path
+import os
+import functools
+import collections
+from runpy import run_path
+# concurrent.futures and multiprocessing.shared_memory are only imported by the parallel engines
+
+# write_fft_file formats the text files with common_pkg_py, the package is run from its file as it is not installed
+_common_pkg_py = run_path(f"{os.path.dirname(os.path.realpath(__file__))}/../../common_pkg/common_pkg_py/__init__.py")
+
+def update_sat_stats(sat_stats,data,maxpos,maxneg):
+    # sat_stats is a 4 element int64 array [sat_high,sat_low,max,min] updated in place with the
+    # values of data before saturation. Only two reductions unless something actually saturates.
+    if data.size==0:
+        return
+    datamax = data.max()
+    datamin = data.min()
+    if datamax>maxpos:
+        sat_stats[0] += np.count_nonzero(data>maxpos)
+    if datamin<maxneg:
+        sat_stats[1] += np.count_nonzero(data<maxneg)
+    sat_stats[2] = max(sat_stats[2],int(datamax))
+    sat_stats[3] = min(sat_stats[3],int(datamin))
+
+def roundsat(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation,print_saturation,sat_stats=None,out=None):
+    # sat_stats: optional [sat_high,sat_low,max,min] array to accumulate into, see update_sat_stats
+    # out: optional array of the same shape and type as data to put the result in, it may be data
+    # itself. Everything is done in place on out, complex data as one interleaved float view
+    # (or the real and imag views when the last axis isn't contiguous). float32/complex64 stay in
+    # single precision, integers become float64.
+    if (integer_bits+fractional_bits)==0:
+        # don't bother rounding.
+        if out is None or out is data:
+            return data
+        np.copyto(out,data)
+        return out
+    if out is None:
+        data = np.asarray(data)
+        out = np.array(data,dtype=data.dtype if np.issubdtype(data.dtype,np.inexact) else np.float64)
+    elif out is not data:
+        np.copyto(out,data)
+    if np.iscomplexobj(out):
+        parts = (out.real,out.imag)
+        try:
+            views = (out.view(out.real.dtype),)
+        except ValueError:
+            views = parts
+    else:
+        parts = views = (out,)
+    if signednum==1:
+        maxpos = ((pow(2,integer_bits+fractional_bits))-1)/(2**fractional_bits)
+        maxneg = (0-(pow(2,integer_bits+fractional_bits)))/(2**fractional_bits)
+    else:
+        maxpos = ((pow(2,integer_bits+fractional_bits))-1)//(2**fractional_bits)
+        maxneg = 0
+    for view in views:
+        # by default around is convergent round2even, not "bankers" round away from 0.
+        # scaling by a power of 2 is exact, so multiplying back is the same as the divide
+        if fractional_bits!=0:
+            np.multiply(view,pow(2,fractional_bits),out=view)
+        if g_do_rounding==1:
+            np.around(view,out=view)
+        else:
+            np.floor(view,out=view)
+        if fractional_bits!=0:
+            np.multiply(view,pow(2.0,-fractional_bits),out=view)
+        if sat_stats is not None:
+            update_sat_stats(sat_stats,view,maxpos,maxneg)
+    if print_saturation==1 and out.size>0:
+        for part in parts:
+            if part.max()>maxpos:
+                print("Saturating values to Max positive")
+            if part.min()<maxneg:
+                print("Saturating Values to Max negative")
+    if g_do_saturation==1:
+        for view in views:
+            np.minimum(view,maxpos,out=view)
+            np.maximum(view,maxneg,out=view)
+    return out
+
+#-------------------------------------
+#-- Emulation of the VHDL twiddle generation (twiddlesPkg.gen_twiddle_factor)
+#-- The +/-1 differences against the python twiddles are mostly not SIN/COS, but the way
+#-- fixed_pkg converts a real: to_sfixed truncates to the fraction width plus fixed_guard_bits
+#-- and only then rounds half to even on those guard bits. So a value just over half an lsb
+#-- with an even lsb rounds down in VHDL and up with np.around.
+#-------------------------------------
+VHDL_FIXED_GUARD_BITS = 3 # fixed_guard_bits in common_pkg/fixed_pkg_c.vhd
+
+def vhdl_to_sfixed(value,g_twiddle_width):
+    # Emulates to_sfixed(value,sfixed(0 downto -(g_twiddle_width-1))) with the fixed_pkg defaults
+    # (fixed_round, fixed_saturate, 3 guard bits). Returns int64 in lsbs of 2**-(g_twiddle_width-1).
+    value = np.asarray(value,dtype=np.float64)
+    maxpos = (1<<(g_twiddle_width-1))-1
+    maxneg = -(1<<(g_twiddle_width-1))
+    # The bit by bit conversion of abs(value) is a truncation, which is exact in double
+    mag = np.floor(np.ldexp(np.abs(value),g_twiddle_width-1+VHDL_FIXED_GUARD_BITS)).astype(np.int64)
+    data = np.where(value<0.0,-mag,mag)
+    # round_fixed: round up when the top guard bit is set and any other guard bit or the lsb is
+    lsb = np.bitwise_and(np.right_shift(data,VHDL_FIXED_GUARD_BITS),1)
+    data = np.right_shift(data+(1<<(VHDL_FIXED_GUARD_BITS-1))-1+lsb,VHDL_FIXED_GUARD_BITS)
+    # Out of range reals saturate before conversion, rounding up past maxpos saturates too
+    data = np.where(value>=1.0,maxpos,data)
+    data = np.where(value<-1.0,maxneg,data)
+    return np.clip(data,maxneg,maxpos)
+
+def twiddle_gen_vhdl(k,wb_instance,stage,wb_factor,g_twiddle_width,do_ifft=False):
+    # Emulates gen_twiddle_factor(k,wb_instance,stage,wb_factor,g_twiddle_width,do_ifft,gen_real) for
+    # an array of k, returns the real (cos) and imag (sin) parts as int64.
+    # The angle is formed in the same order as the VHDL so it is the same double. SIN/COS are the C
+    # library ones, a simulator whose math_real is less accurate can still be 1 lsb off on values that
+    # land right on a guard bit boundary; a magic file from tb_vu_twiddlepkg still overrides this.
+    fftsize = (2**stage)*wb_factor
+    idx = (wb_instance % fftsize) + np.asarray(k,dtype=np.int64)*wb_factor
+    if np.any(idx>=fftsize):
+        raise ValueError('twiddle_gen_vhdl: Calculated idx exceed idx size')
+    sign = 1.0 if do_ifft else -1.0
+    angle = sign*np.pi*idx.astype(np.float64)/float(fftsize)
+    return vhdl_to_sfixed(np.cos(angle),g_twiddle_width),vhdl_to_sfixed(np.sin(angle),g_twiddle_width)
+
+# Process wide LRU cache of twiddle tables, keyed by (fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,g_use_vhdl).
+# Each entry holds (source,coeffs), source is "vhdl_file" for a magic file, "vhdl" for the VHDL emulation and
+# "python" otherwise. Magic file tables are never sliced for other sizes, every size checks for its own file.
+TWIDDLE_CACHE_SIZE = 64
+_twiddle_cache = collections.OrderedDict()
+
+def twiddle_cache_clear():
+    # Forget all cached twiddle tables, needed if magic files are added while the process is running.
+    _twiddle_cache.clear()
+    twiddle_gen_int.cache_clear()
+
+def _twiddle_cache_stride(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,source):
+    # The twiddles for fftsize are every (M/fftsize)th twiddle of a larger table of size M, with the
+    # same arguments to exp (VHDL: cos/sin(-pi*idx/fftsize)) down to the last bit since the sizes are
+    # powers of 2. So slice the largest table we already have of the same source instead of recomputing.
+    best = None
+    for key,(entry_source,coeffs) in _twiddle_cache.items():
+        if key[1:4]==(g_twiddle_width,g_do_rounding,g_do_saturation) and entry_source==source and key[0]>fftsize:
+            if best is None or key[0]>best.size:
+                best = coeffs
+    if best is None:
+        return None
+    return best[::best.size//fftsize]
+
+def twiddle_gen(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,g_use_vhdl,verbose=True):
+    # Tables are cached, the returned array is shared so it is read only.
+    key = (fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,bool(g_use_vhdl))
+    if key in _twiddle_cache:
+        _twiddle_cache.move_to_end(key)
+        return _twiddle_cache[key][1]
+    coefpath = Path(f"{os.path.realpath(os.path.dirname(__file__))}/twiddlepkg_twidth{g_twiddle_width}_fftsize{fftsize}.txt")
+    if g_use_vhdl:
+        # the VHDL twiddle generator converts its SIN/COS with fixed_pkg, which rounds differently
+        # from the python generation. This causes +/- 1 errors in the twiddles
+        # To get a perfect FFT simulation twiddle_gen_vhdl emulates the VHDL arithmetic.
+        # A lookup table generated by VHDL (tb_vu_twiddlepkg output, the "magic file") put in the
+        # directory that contains this script still takes precedence, for simulators whose math_real
+        # doesn't match the emulation.
+        if Path(coefpath).is_file():
+            source = "vhdl_file"
+            if verbose:
+                print("Using Prestored VHDL coefficients for this size")
+            data = np.loadtxt(coefpath,dtype="int")
+            if verbose:
+                print("Loading Twiddles from: %s" % str(coefpath))
+            coeffs = (data[0:data.size:2]+1j*data[1:data.size:2]) / (2**(g_twiddle_width-1))
+        else:
+            source = "vhdl"
+            coeffs = _twiddle_cache_stride(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,source)
+            if coeffs is not None:
+                if verbose:
+                    print("Using emulated VHDL Coefficients of a cached larger size")
+            else:
+                if verbose:
+                    print("Using emulated VHDL Coefficient Generation")
+                tw_re,tw_im = twiddle_gen_vhdl(np.arange(0,fftsize),0,int(np.log2(fftsize)),1,g_twiddle_width)
+                coeffs = (tw_re+1j*tw_im) / (2**(g_twiddle_width-1))
+    else:
+        source = "python"
+        coeffs = _twiddle_cache_stride(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,source)
+        if coeffs is not None:
+            if verbose:
+                print("Using Python Coefficients of a cached larger size")
+        else:
+            if verbose:
+                print("Using Python Coefficient Generation")
+            coeff_indices = np.arange(0,fftsize)
+            coeffs = np.exp(np.multiply(coeff_indices,1.0j * -2*np.pi / (2*fftsize)))
+            coeffs = roundsat(coeffs,1,0,g_twiddle_width-1,g_do_rounding,g_do_saturation,0)  # coeffs will still be floating point, but will have the precision indicated by g_twiddle_width
+    coeffs.setflags(write=False)
+    _twiddle_cache[key] = (source,coeffs)
+    if len(_twiddle_cache)>TWIDDLE_CACHE_SIZE:
+        _twiddle_cache.popitem(last=False)
+    return coeffs
+
+def fft_butterfly(xa,xb,twiddle,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats=None,out=None):
+    # xa/xb are assumeed to be integers between stages, any fraction will be rounded off on outputs
+    # With sat_stats ([sat_high,sat_low,max,min]) the saturations are counted there instead of printed,
+    # max/min are only taken from the outputs.
+    # out: optional (ya,yb) complex arrays to write the outputs to, they must not overlap xa/xb.
+    print_saturation = 1 if sat_stats is None else 0
+    mult_stats = None if sat_stats is None else np.zeros_like(sat_stats)
+    if out is None:
+        out = (np.empty(np.broadcast(xa,xb).shape,np.complex128),np.empty(np.broadcast(xa,xb).shape,np.complex128))
+    ya,yb = out
+    if g_do_dif==1:
+        np.add(xa,xb,out=ya)
+        np.subtract(xa,xb,out=yb)
+        np.multiply(yb,twiddle,out=yb)
+        # this isn't really best practice to round here, but it's what the VHDL does
+        roundsat(yb,1,g_output_width-1,0,g_do_rounding,g_do_saturation,print_saturation,mult_stats,yb)
+    else:
+        # the rounded product goes through yb
+        np.multiply(xb,twiddle,out=yb)
+        # this isn't really best practice to round here, but it's what the VHDL does
+        roundsat(yb,1,g_output_width-1,0,g_do_rounding,g_do_saturation,print_saturation,mult_stats,yb)
+        np.add(xa,yb,out=ya)
+        np.subtract(xa,yb,out=yb)
+    if g_bits_to_round_off!=0:
+        np.multiply(ya,pow(2,(-g_bits_to_round_off)),out=ya)
+        np.multiply(yb,pow(2,(-g_bits_to_round_off)),out=yb)
+    roundsat(ya,1,g_output_width-1,0,g_do_rounding,g_do_saturation,print_saturation,sat_stats,ya) # no fraction bit on output, integer only!
+    roundsat(yb,1,g_output_width-1,0,g_do_rounding,g_do_saturation,print_saturation,sat_stats,yb)
+    if sat_stats is not None:
+        sat_stats[0:2] += mult_stats[0:2]
+    return ya,yb
+
+def fft_stage(stage_in,fft_size_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats=None,scratch=None):
+    # scratch: optional pair of complex arrays of stage_in.size//2 for the butterfly outputs, so a
+    # caller running many stages can reuse them instead of allocating new ones every stage
+    # Make sure input is the length
+    if fft_size_log2==0:
+        stage_out=stage_in
+        return stage_out
+    if np.mod(stage_in.shape[0],2**fft_size_log2)>0:
+        stage_in = stage_in[1:(2**fft_size_log2)*(stage_in.shape[0]//2**fft_size_log2)]
+    #Both DIF and DIT butterflies pair up the two halves of every block of 2**fft_size_log2
+    #samples with the twiddle exp(-j*pi*k/(fftsize/2)) for the k'th pair, only the butterfly differs.
+    #DIF runs the stages from the largest block size down (natural in, bit reversed out) and
+    #DIT from the smallest up (bit reversed in, natural out).
+    #View stage_in as blocks X 2 X fftsize/2, so no transposes are needed and
+    #the twiddles broadcast across all the blocks
+    half = 2**(fft_size_log2-1)
+    data = np.reshape(stage_in,(np.shape(stage_in)[0]//(2*half),2,half))
+    xa = data[:,0,:]
+    xb = data[:,1,:]
+    # Twiddle values are always rounded and saturated.
+    twiddle = twiddle_gen(half,g_twiddle_width,1,1,1,verbose=False)
+    if scratch is None:
+        scratch = (np.empty(xa.size,np.complex128),np.empty(xb.size,np.complex128))
+    ya,yb = fft_butterfly(xa,xb,twiddle,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats,
+                          (scratch[0].reshape(xa.shape),scratch[1].reshape(xb.shape)))
+    stage_out = np.empty(data.shape,np.complex128)
+    stage_out[:,0,:] = ya
+    stage_out[:,1,:] = yb
+    stage_out = np.reshape(stage_out,(stage_out.size,1))
+    return stage_out
+
+def bit_reverse_traverse_no_generator(a):
+    n = a.shape[0]
+    assert(not n&(n-1))
+
+    if n == 1:
+        return a
+    else:
+        even_indicies = np.arange(n/2,dtype=np.int32)*2
+        odd_indicies = np.arange(n/2,dtype=np.int32)*2 + 1
+
+        evens = bit_reverse_traverse_no_generator(a[even_indicies])
+        odds = bit_reverse_traverse_no_generator(a[odd_indicies])
+
+        return np.concatenate([evens, odds])
+
+def get_bit_reversed_list_no_generator(l):
+    indexs = bit_reverse_indices(int(np.log2(len(l))))
+    return [l[i] for i in indexs]
+
+@functools.lru_cache(maxsize=None)
+def bit_reverse_indices(fftsize_log2):
+    # Permutation index for a bit reversed reorder of 2**fftsize_log2 points, cached per FFT size.
+    # Built a bit at a time over the whole index vector rather than recursing.
+    # The returned array is shared by all callers so it is read only.
+    indexs = np.arange(2**fftsize_log2,dtype=np.intp)
+    rev_indexs = np.zeros_like(indexs)
+    for bit in range(0,fftsize_log2):
+        rev_indexs |= ((indexs >> bit) & 1) << (fftsize_log2-1-bit)
+    rev_indexs.setflags(write=False)
+    return rev_indexs
+
+def bitrevorder(a):
+    # Bit reverse the last axis of a, so a (frames x fftsize) array has every frame reordered
+    # with a single fancy index operation.
+    a = np.asarray(a)
+    n = a.shape[-1]
+    assert(not n&(n-1))
+    return a[...,bit_reverse_indices(n.bit_length()-1)]
+
+
+class FftStats:
+    # Per stage overflow telemetry of the fixed point FFT model, indexed by stage number in processing
+    # order (the same as stagedebug). The counts are of real and imaginary values separately.
+    #   sat_high/sat_low - values above max positive / below max negative before saturation (these
+    #                      include the rounding after the twiddle multiply)
+    #   max_val/min_val  - largest/smallest stage output value before saturation
+    #   peak             - largest stage output magnitude
+    #   headroom_bits    - spare bits of the stage output width, negative when the stage overflowed
+    # Stats from several runs (blocks of a stream, shards) can be combined with merge.
+    def __init__(self,g_output_width):
+        self.output_width = np.array(g_output_width,dtype=np.int64)
+        self.counts = np.zeros((self.output_width.size,4),dtype=np.int64)
+
+    @property
+    def sat_high(self):
+        return self.counts[:,0]
+
+    @property
+    def sat_low(self):
+        return self.counts[:,1]
+
+    @property
+    def max_val(self):
+        return self.counts[:,2]
+
+    @property
+    def min_val(self):
+        return self.counts[:,3]
+
+    @property
+    def peak(self):
+        return np.maximum(self.max_val,-self.min_val)
+
+    @property
+    def headroom_bits(self):
+        # bits needed for a signed value v: bit_length(v)+1 for v>=0, bit_length(-v-1)+1 for v<0
+        needed = np.array([max(int(mx).bit_length(),int(-mn-1).bit_length())+1 for mx,mn in zip(self.max_val,self.min_val)],dtype=np.int64)
+        return self.output_width - needed
+
+    def merge(self,other):
+        self.counts[:,0:2] += other.counts[:,0:2]
+        self.counts[:,2] = np.maximum(self.counts[:,2],other.counts[:,2])
+        self.counts[:,3] = np.minimum(self.counts[:,3],other.counts[:,3])
+        return self
+
+    def __repr__(self):
+        lines = ["stage width sat_high sat_low peak headroom_bits"]
+        for stage_num,(width,high,low,peak,headroom) in enumerate(zip(self.output_width,self.sat_high,self.sat_low,self.peak,self.headroom_bits)):
+            lines.append("%5d %5d %8d %7d %4d %13d" % (stage_num,width,high,low,peak,headroom))
+        return "\n".join(lines)
+
+def make_stage_npy_sink(output_path):
+    # Returns a stage_capture callback for pfft/pfft_int that saves each stage straight to
+    # <output_path>/stagedebug<stage_num>.npy instead of keeping it in memory.
+    def stage_sink(stage_num,*stage_data):
+        if len(stage_data)==1:
+            np.save(Path(output_path) / f"stagedebug{stage_num}.npy",stage_data[0].reshape(-1))
+        else:
+            np.save(Path(output_path) / f"stagedebug{stage_num}.npy",stage_data[0]+1j*stage_data[1])
+    return stage_sink
+
+def pfft(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture="all",return_stats=False):
+    # With return_stats=True saturations are counted instead of printed and a FftStats is returned
+    # as a third value.
+    # stage_capture picks what is returned as stagedebug:
+    #   "all"     - the data.size x stages complex matrix of every stage output (default)
+    #   None      - nothing is captured and stagedebug is None (costs nothing)
+    #   a list of stage numbers - a dict of stage number -> copy of that stage output
+    #   a callable - called as stage_capture(stage_num,stage_out) after each stage, eg make_stage_npy_sink,
+    #                stagedebug is None
+    # enforce that input data is a multiple of the FFTsize
+    if np.mod(data.shape[0],pow(2,fftsize_log2))>0:
+        data = data[1:(pow(2,fftsize_log2)*np.floor(data.shape[1]/pow(2,fftsize_log2)))]
+
+
+    if g_do_dif==1:
+        idxlog2range = np.arange(fftsize_log2,0,-1)
+    else:
+        idxlog2range = np.arange(1,fftsize_log2+1)
+    if g_do_bit_rev_input==1:
+        # reorder every frame in one go on a frames x fftsize view
+        data = np.reshape(bitrevorder(np.reshape(data,(data.shape[0]//(2**fftsize_log2),2**fftsize_log2))),data.shape)
+
+
+    stageout = data
+    stage_num = 0
+    # fetch the largest twiddle table first so the tables for the smaller stages are sliced from it
+    if fftsize_log2>0:
+        twiddle_gen(2**(fftsize_log2-1),g_twiddle_width,1,1,1,verbose=False)
+    if g_output_width.size != idxlog2range.size:
+        raise ValueError('g_output_width not long enough')
+        return 1
+    if len(g_bits_to_round_off) != len(idxlog2range):
+        raise ValueError('g_bits_to_round_off not long enough')
+        return 1
+    if stage_capture is None or callable(stage_capture):
+        stagedebug = None
+    elif isinstance(stage_capture,str) and stage_capture=="all":
+        stagedebug =np.zeros((data.size,idxlog2range.size),dtype=np.complex128)
+    else:
+        stagedebug = {}
+    stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if return_stats else None
+    # butterfly outputs, shared by all the stages
+    scratch = (np.empty(stageout.size//2,np.complex128),np.empty(stageout.size//2,np.complex128))
+    for idxlog2 in idxlog2range:
+        if not return_stats:
+            print("Processing Stage %d of %d\n"%(stage_num,len(idxlog2range)))
+        stageout = fft_stage(stageout,int(idxlog2),g_twiddle_width,g_do_rounding,g_do_saturation,int(g_output_width[idxlog2-1]),int(g_bits_to_round_off[idxlog2-1]),g_do_dif,
+                             None if stats is None else stats.counts[stage_num],scratch)
+        if callable(stage_capture):
+            stage_capture(stage_num,stageout)
+        elif isinstance(stagedebug,dict):
+            if stage_num in stage_capture:
+                stagedebug[stage_num] = stageout[:,0].copy()
+        elif stagedebug is not None:
+            stagedebug[:,stage_num] = stageout[:,0]
+        stage_num = stage_num + 1
+
+    if g_do_bit_rev_output==1:
+        # reorder every frame in one go on a frames x fftsize view
+        stageout = np.reshape(bitrevorder(np.reshape(stageout,((np.shape(stageout)[0]//(2**fftsize_log2)),(2**fftsize_log2)))),stageout.shape)
+    if return_stats:
+        return stageout,stagedebug,stats
+    return stageout,stagedebug
+
+#-------------------------------------
+#-- Integer engine
+#-- Same arithmetic as roundsat/fft_butterfly/fft_stage/pfft above, but the real and imaginary parts
+#-- are held as a pair of int64 arrays, the twiddles are scaled integers and the rounding/saturation
+#-- are shifts and clips. The results are bit identical to pfft, without the float mantissa limit on
+#-- the stage widths (products only need to fit in 63 bits).
+#-------------------------------------
+def roundsat_int(data,shift_bits,g_output_width,g_do_rounding,g_do_saturation,sat_stats=None):
+    # Divide the integer data by 2**shift_bits and keep the integer part, then saturate to a signed
+    # g_output_width number. Works in place on data (int64) and returns it.
+    # Rounding matches np.around in roundsat: convergent, round half to even.
+    # sat_stats: optional [sat_high,sat_low,max,min] array to accumulate into, see update_sat_stats
+    # Array parameters select the per config path, see roundsat_int_cfg.
+    if np.ndim(shift_bits) or np.ndim(g_output_width) or np.ndim(g_do_rounding) or np.ndim(g_do_saturation):
+        return roundsat_int_cfg(data,shift_bits,g_output_width,g_do_rounding,g_do_saturation,sat_stats)
+    if shift_bits>0:
+        if g_do_rounding==1:
+            # (x + half - 1 + lsb_of_quotient) >> shift is round half to even
+            lsb = np.right_shift(data,shift_bits)
+            np.bitwise_and(lsb,1,out=lsb)
+            data += (1<<(shift_bits-1))-1
+            data += lsb
+        np.right_shift(data,shift_bits,out=data)
+    if sat_stats is not None:
+        update_sat_stats(sat_stats,data,(1<<(g_output_width-1))-1,-(1<<(g_output_width-1)))
+    if g_do_saturation==1:
+        np.clip(data,-(1<<(g_output_width-1)),(1<<(g_output_width-1))-1,out=data)
+    return data
+
+def roundsat_int_cfg(data,shift_bits,g_output_width,g_do_rounding,g_do_saturation,sat_stats=None):
+    # roundsat_int with a leading config axis: data is (configs, ...) and every parameter is a scalar or
+    # a (configs,1,...,1) array with the same number of dimensions as data. sat_stats is (configs x 4).
+    shift_bits = np.asarray(shift_bits,dtype=np.int64)
+    g_output_width = np.asarray(g_output_width,dtype=np.int64)
+    g_do_rounding = np.asarray(g_do_rounding)
+    g_do_saturation = np.asarray(g_do_saturation)
+    if sat_stats is None and all(param.min()==param.max() for param in (shift_bits,g_output_width,g_do_rounding,g_do_saturation)):
+        # every config the same, use the scalar path
+        return roundsat_int(data,int(shift_bits.flat[0]),int(g_output_width.flat[0]),int(g_do_rounding.flat[0]),int(g_do_saturation.flat[0]))
+    if shift_bits.max()>0:
+        do_round = (g_do_rounding==1) & (shift_bits>0)
+        if do_round.any():
+            lsb = np.right_shift(data,shift_bits)
+            np.bitwise_and(lsb,1,out=lsb)
+            lsb += np.left_shift(1,np.maximum(shift_bits-1,0))-1
+            if not do_round.all():
+                lsb *= do_round
+            data += lsb
+        np.right_shift(data,shift_bits,out=data)
+    maxpos = np.left_shift(1,g_output_width-1)-1
+    maxneg = -np.left_shift(1,g_output_width-1)
+    if sat_stats is not None and data.size>0:
+        axes = tuple(range(1,data.ndim))
+        datamax = data.max(axis=axes).reshape(-1)
+        datamin = data.min(axis=axes).reshape(-1)
+        if np.any(datamax>maxpos.reshape(-1)):
+            sat_stats[:,0] += np.count_nonzero(data>maxpos,axis=axes).reshape(-1)
+        if np.any(datamin<maxneg.reshape(-1)):
+            sat_stats[:,1] += np.count_nonzero(data<maxneg,axis=axes).reshape(-1)
+        np.maximum(sat_stats[:,2],datamax,out=sat_stats[:,2])
+        np.minimum(sat_stats[:,3],datamin,out=sat_stats[:,3])
+    do_sat = g_do_saturation==1
+    if do_sat.any():
+        if not do_sat.all():
+            int64_info = np.iinfo(np.int64)
+            maxpos = np.where(do_sat,maxpos,int64_info.max)
+            maxneg = np.where(do_sat,maxneg,int64_info.min)
+        np.minimum(data,maxpos,out=data)
+        np.maximum(data,maxneg,out=data)
+    return data
+
+def requantize_int(data,g_lsb_w,g_out_dat_w,g_do_rounding,g_do_saturation):
+    # common_requantize on int64 data in place: g_lsb_w > 0 rounds off LSBs, g_lsb_w < 0 inserts them.
+    if g_lsb_w<0:
+        np.left_shift(data,-g_lsb_w,out=data)
+        g_lsb_w = 0
+    return roundsat_int(data,g_lsb_w,g_out_dat_w,g_do_rounding,g_do_saturation)
+
+def fft_stage_widths(g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_guard_enable=True,g_out_gain_w=0):
+    # Internal widths of the pipelined FFT as set up in rTwoSDF/fft_r2_pipe (fft_gnrcs_intrfcs_pkg):
+    #   c_in_scale_w  = stage_dat_w - in_dat_w - guard_w (guard_w only with guard_enable, rTwoSDF always)
+    #   c_out_scale_w = stage_dat_w - out_dat_w - out_gain_w (negative inserts LSBs)
+    # g_stage_dat_w is a single width or one width per stage (indexed by stage, as g_output_width).
+    # Returns in_scale_w, the per stage g_output_width array and out_scale_w.
+    g_output_width = np.broadcast_to(np.asarray(g_stage_dat_w,dtype=np.int64),(g_fftsize_log2,)).copy()
+    # DIF: the input goes into stage g_fftsize_log2 first and stage 1 drives the output
+    in_scale_w = int(g_output_width[-1]) - g_in_dat_w - (g_guard_w if g_guard_enable else 0)
+    out_scale_w = int(g_output_width[0]) - g_out_dat_w - g_out_gain_w
+    if in_scale_w<0:
+        raise ValueError('g_stage_dat_w too narrow for g_in_dat_w and g_guard_w')
+    return in_scale_w,g_output_width,out_scale_w
+
+def scale_sched_bits(scale_sched,g_fftsize_log2):
+    # scale_sched word of the testbenches -> g_bits_to_round_off, bit i set rounds one bit off stage i
+    return (scale_sched >> np.arange(g_fftsize_log2)) & 1
+
+def rtwosdf_int(data,g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_twiddle_width,g_do_rounding,g_do_saturation,g_bits_to_round_off,g_use_reorder,g_guard_enable=True,return_stats=False,g_nof_chan=0):
+    # Integer model of rTwoSDF from input to output port: the input is scaled up to the stage width
+    # leaving g_guard_w guard bits, the stages run at g_stage_dat_w (see fft_stage_widths) and the
+    # output is requantized to g_out_dat_w. data as for pfft_int, returns re,im (and a FftStats).
+    in_scale_w,g_output_width,out_scale_w = fft_stage_widths(g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_guard_enable)
+    data_re,data_im = _split_re_im(data)
+    np.left_shift(data_re,in_scale_w,out=data_re)
+    np.left_shift(data_im,in_scale_w,out=data_im)
+    result = pfft_int((data_re,data_im),g_fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,1,0,1 if g_use_reorder else 0,return_stats=return_stats,g_nof_chan=g_nof_chan)
+    requantize_int(result[0],out_scale_w,g_out_dat_w,g_do_rounding,g_do_saturation)
+    requantize_int(result[1],out_scale_w,g_out_dat_w,g_do_rounding,g_do_saturation)
+    return result
+
+@functools.lru_cache(maxsize=TWIDDLE_CACHE_SIZE)
+def twiddle_gen_int(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,g_use_vhdl):
+    # Twiddles from twiddle_gen scaled back to integers (S0.(g_twiddle_width-1)), returned as re,im int64.
+    # Cached alongside twiddle_gen, so the arrays are read only.
+    coeffs = twiddle_gen(fftsize,g_twiddle_width,g_do_rounding,g_do_saturation,g_use_vhdl,verbose=False)*(2**(g_twiddle_width-1))
+    tw_re = np.rint(np.real(coeffs)).astype(np.int64)
+    tw_im = np.rint(np.imag(coeffs)).astype(np.int64)
+    tw_re.setflags(write=False)
+    tw_im.setflags(write=False)
+    return tw_re,tw_im
+
+def fft_butterfly_int(xa_re,xa_im,xb_re,xb_im,tw_re,tw_im,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats=None):
+    # Integer version of fft_butterfly, returns ya_re,ya_im,yb_re,yb_im as new int64 arrays.
+    # The twiddle product has g_twiddle_width-1 fraction bits which are rounded off straight away,
+    # the same as the VHDL (and roundsat on the float product) does.
+    # sat_stats as for fft_butterfly, saturations are never printed.
+    mult_stats = None if sat_stats is None else np.zeros_like(sat_stats)
+    if g_do_dif==1:
+        ya_re = xa_re + xb_re
+        ya_im = xa_im + xb_im
+        d_re = xa_re - xb_re
+        d_im = xa_im - xb_im
+        yb_re = d_re*tw_re - d_im*tw_im
+        yb_im = d_re*tw_im + d_im*tw_re
+        roundsat_int(yb_re,g_twiddle_width-1,g_output_width,g_do_rounding,g_do_saturation,mult_stats)
+        roundsat_int(yb_im,g_twiddle_width-1,g_output_width,g_do_rounding,g_do_saturation,mult_stats)
+    else:
+        t_re = xb_re*tw_re - xb_im*tw_im
+        t_im = xb_re*tw_im + xb_im*tw_re
+        roundsat_int(t_re,g_twiddle_width-1,g_output_width,g_do_rounding,g_do_saturation,mult_stats)
+        roundsat_int(t_im,g_twiddle_width-1,g_output_width,g_do_rounding,g_do_saturation,mult_stats)
+        ya_re = xa_re + t_re
+        ya_im = xa_im + t_im
+        yb_re = xa_re - t_re
+        yb_im = xa_im - t_im
+    for y in (ya_re,ya_im,yb_re,yb_im):
+        roundsat_int(y,g_bits_to_round_off,g_output_width,g_do_rounding,g_do_saturation,sat_stats)
+    if sat_stats is not None:
+        sat_stats[...,0:2] += mult_stats[...,0:2]
+    return ya_re,ya_im,yb_re,yb_im
+
+def fft_stage_int(data_re,data_im,fft_size_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats=None,tw_re=None,tw_im=None):
+    # data_re/data_im are (frames x fftsize) int64 arrays, processed in place.
+    # A stage of size 2**fft_size_log2 splits every frame into blocks of that size and does the
+    # butterflies between the first and second half of each block, no transposes needed.
+    # The same block layout is used for DIF and DIT (see fft_stage), only the butterfly differs.
+    # tw_re/tw_im override the twiddles, they have to broadcast against (..., blocks, fftsize/2)
+    if fft_size_log2==0:
+        return data_re,data_im
+    half = 2**(fft_size_log2-1)
+    if tw_re is None:
+        tw_re,tw_im = twiddle_gen_int(half,g_twiddle_width,1,1,1)
+    blocks_re = data_re.reshape(data_re.shape[:-1]+(data_re.shape[-1]//(2*half),2,half))
+    blocks_im = data_im.reshape(data_im.shape[:-1]+(data_im.shape[-1]//(2*half),2,half))
+    ya_re,ya_im,yb_re,yb_im = fft_butterfly_int(blocks_re[...,0,:],blocks_im[...,0,:],blocks_re[...,1,:],blocks_im[...,1,:],
+                                                tw_re,tw_im,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,sat_stats)
+    blocks_re[...,0,:] = ya_re
+    blocks_im[...,0,:] = ya_im
+    blocks_re[...,1,:] = yb_re
+    blocks_im[...,1,:] = yb_im
+    return data_re,data_im
+
+def make_fft_stats(fftsize_log2,g_output_width,g_do_dif):
+    # Empty FftStats for an FFT, with the stage widths in processing order
+    g_output_width = np.asarray(g_output_width)
+    if g_do_dif==1:
+        return FftStats(g_output_width[np.arange(fftsize_log2,0,-1)-1])
+    return FftStats(g_output_width[np.arange(1,fftsize_log2+1)-1])
+
+def pfft_int_frames(data_re,data_im,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture=None,stats=None):
+    # Core of the integer engine. data_re/data_im are int64 arrays of shape (..., fftsize), every
+    # leading index is an independent frame and all of them go through each stage together.
+    # The arrays are processed in place, returns re,im of the same shape.
+    # stage_capture is an optional callable, called as stage_capture(stage_num,stage_re,stage_im)
+    # after each stage (the arrays are the working buffers, copy them to keep them).
+    # stats is an optional FftStats (see make_fft_stats) the per stage telemetry is added to.
+    if g_do_dif==1:
+        idxlog2range = np.arange(fftsize_log2,0,-1)
+    else:
+        idxlog2range = np.arange(1,fftsize_log2+1)
+    if np.size(g_output_width) != idxlog2range.size:
+        raise ValueError('g_output_width not long enough')
+    if len(g_bits_to_round_off) != len(idxlog2range):
+        raise ValueError('g_bits_to_round_off not long enough')
+    if data_re.shape[-1] != 2**fftsize_log2:
+        raise ValueError('last axis of data must be the FFT size')
+    if g_do_bit_rev_input==1:
+        data_re = bitrevorder(data_re)
+        data_im = bitrevorder(data_im)
+    # fetch the largest twiddle table first so the tables for the smaller stages are sliced from it
+    if fftsize_log2>0:
+        twiddle_gen(2**(fftsize_log2-1),g_twiddle_width,1,1,1,verbose=False)
+    for stage_num,idxlog2 in enumerate(idxlog2range):
+        fft_stage_int(data_re,data_im,int(idxlog2),g_twiddle_width,g_do_rounding,g_do_saturation,int(g_output_width[idxlog2-1]),int(g_bits_to_round_off[idxlog2-1]),g_do_dif,
+                      None if stats is None else stats.counts[stage_num])
+        if stage_capture is not None:
+            stage_capture(stage_num,data_re,data_im)
+    if g_do_bit_rev_output==1:
+        data_re = bitrevorder(data_re)
+        data_im = bitrevorder(data_im)
+    return data_re,data_im
+
+def _split_re_im(data):
+    # complex array or (re,im) tuple -> new int64 re,im arrays
+    if isinstance(data,tuple):
+        return np.array(data[0],dtype=np.int64),np.array(data[1],dtype=np.int64)
+    return np.real(data).astype(np.int64),np.imag(data).astype(np.int64)
+
+def chan_deinterleave(data,g_nof_chan):
+    # (..., fftsize*2**g_nof_chan) stream with the channels time multiplexed per point
+    # (point major, channel minor as in rTwoSDF) -> (..., channels, fftsize), a view where possible.
+    nof_channels = 2**g_nof_chan
+    data = np.asarray(data)
+    return data.reshape(data.shape[:-1]+(-1,nof_channels)).swapaxes(-1,-2)
+
+def chan_interleave(data):
+    # Inverse of chan_deinterleave: (..., channels, fftsize) -> (..., fftsize*channels)
+    data = np.asarray(data).swapaxes(-1,-2)
+    return data.reshape(data.shape[:-2]+(-1,))
+
+def pfft_int(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture=None,return_stats=False,g_nof_chan=0):
+    # Integer engine equivalent of pfft. data is a complex array of integer values (or a tuple of
+    # re,im integer arrays), any samples beyond the last whole frame are dropped.
+    # Returns the output as a tuple of 1D int64 arrays re,im. stage_capture as for pfft_int_frames.
+    # With return_stats=True a FftStats is returned as a third value.
+    # With g_nof_chan > 0 a frame holds 2**g_nof_chan interleaved channels, as rTwoSDF takes them, the
+    # output keeps that interleaving (rTwoOrder reorders within each channel).
+    if g_nof_chan>0:
+        return _pfft_int_chan(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture,return_stats,g_nof_chan)
+    fftsize = 2**fftsize_log2
+    if isinstance(data,tuple):
+        nof_frames = np.shape(data[0])[0]//fftsize
+        data = (data[0][0:nof_frames*fftsize],data[1][0:nof_frames*fftsize])
+    else:
+        nof_frames = data.shape[0]//fftsize
+        data = data[0:nof_frames*fftsize]
+    data_re,data_im = _split_re_im(data)
+    stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if return_stats else None
+    data_re,data_im = pfft_int_frames(data_re.reshape(nof_frames,fftsize),data_im.reshape(nof_frames,fftsize),fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture,stats)
+    if return_stats:
+        return data_re.reshape(-1),data_im.reshape(-1),stats
+    return data_re.reshape(-1),data_im.reshape(-1)
+
+def _pfft_int_chan(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture,return_stats,g_nof_chan):
+    # pfft_int for interleaved channels: all channels of all frames go through the stages together
+    page_size = 2**(fftsize_log2+g_nof_chan)
+    data_re,data_im = _split_re_im(data)
+    nof_pages = data_re.size//page_size
+    data_re = chan_deinterleave(data_re[0:nof_pages*page_size].reshape(nof_pages,page_size),g_nof_chan)
+    data_im = chan_deinterleave(data_im[0:nof_pages*page_size].reshape(nof_pages,page_size),g_nof_chan)
+    stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if return_stats else None
+    data_re,data_im = pfft_int_frames(np.ascontiguousarray(data_re),np.ascontiguousarray(data_im),fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture,stats)
+    data_re = chan_interleave(data_re).reshape(-1)
+    data_im = chan_interleave(data_im).reshape(-1)
+    if return_stats:
+        return data_re,data_im,stats
+    return data_re,data_im
+
+def pfft_batch(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,return_stats=False):
+    # Batched entry point of the integer engine.
+    # data is (n_frames x fftsize), or (n_wb_streams x n_frames x fftsize) for several independent
+    # streams (as with g_nof_wb_streams), either complex with integer values or a tuple of re,im
+    # integer arrays. All frames of all streams are processed at once through every stage.
+    # Returns re,im int64 arrays with the same shape as the input (and a FftStats with return_stats=True).
+    data_re,data_im = _split_re_im(data)
+    if data_re.ndim not in (2,3):
+        raise ValueError('pfft_batch data must be (n_frames x fftsize) or (n_wb_streams x n_frames x fftsize)')
+    stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if return_stats else None
+    data_re,data_im = pfft_int_frames(data_re,data_im,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,None,stats)
+    if return_stats:
+        return data_re,data_im,stats
+    return data_re,data_im
+
+def pfft_sweep(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,return_stats=False,configs_per_block=None):
+    # The integer engine over many configs in one call. g_do_rounding/g_do_saturation are scalars or
+    # one value per config, g_output_width/g_bits_to_round_off are per stage or (configs x stages).
+    # The input (as for pfft_int, or frames on the last axis as for pfft_batch) is split, cut to whole
+    # frames and bit reversed once and every config shares the twiddles.
+    # The configs go through the stages configs_per_block at a time on a leading config axis, by
+    # default as many as keep a block around 2**18 samples so it stays in cache over all the stages.
+    # Returns re,im of shape (configs, ...) (and a list of FftStats, one per config, with return_stats=True).
+    fftsize = 2**fftsize_log2
+    data_re,data_im = _split_re_im(data)
+    if data_re.ndim==1:
+        nof_frames = data_re.size//fftsize
+        data_re = data_re[0:nof_frames*fftsize]
+        data_im = data_im[0:nof_frames*fftsize]
+    out_shape = data_re.shape
+    data_re = data_re.reshape(-1,fftsize)
+    data_im = data_im.reshape(-1,fftsize)
+    g_output_width = np.atleast_2d(np.asarray(g_output_width,dtype=np.int64))
+    g_bits_to_round_off = np.atleast_2d(np.asarray(g_bits_to_round_off,dtype=np.int64))
+    g_do_rounding = np.atleast_1d(np.asarray(g_do_rounding,dtype=np.int64))
+    g_do_saturation = np.atleast_1d(np.asarray(g_do_saturation,dtype=np.int64))
+    nof_configs = max(g_output_width.shape[0],g_bits_to_round_off.shape[0],g_do_rounding.size,g_do_saturation.size)
+    if g_output_width.shape[1]!=fftsize_log2:
+        raise ValueError('g_output_width not long enough')
+    if g_bits_to_round_off.shape[1]!=fftsize_log2:
+        raise ValueError('g_bits_to_round_off not long enough')
+    g_output_width = np.broadcast_to(g_output_width,(nof_configs,fftsize_log2))
+    g_bits_to_round_off = np.broadcast_to(g_bits_to_round_off,(nof_configs,fftsize_log2))
+    g_do_rounding = np.broadcast_to(g_do_rounding,(nof_configs,))
+    g_do_saturation = np.broadcast_to(g_do_saturation,(nof_configs,))
+    if configs_per_block is None:
+        configs_per_block = max(1,2**18//max(1,data_re.size))
+    if g_do_bit_rev_input==1:
+        data_re = bitrevorder(data_re)
+        data_im = bitrevorder(data_im)
+    if g_do_dif==1:
+        idxlog2range = np.arange(fftsize_log2,0,-1)
+    else:
+        idxlog2range = np.arange(1,fftsize_log2+1)
+    if fftsize_log2>0:
+        twiddle_gen(2**(fftsize_log2-1),g_twiddle_width,1,1,1,verbose=False)
+    stats = [make_fft_stats(fftsize_log2,g_output_width[cfg],g_do_dif) for cfg in range(nof_configs)] if return_stats else None
+    out_re = np.empty((nof_configs,)+data_re.shape,dtype=np.int64)
+    out_im = np.empty((nof_configs,)+data_im.shape,dtype=np.int64)
+    for cfg_start in range(0,nof_configs,configs_per_block):
+        cfgs = slice(cfg_start,min(cfg_start+configs_per_block,nof_configs))
+        block_re = out_re[cfgs]
+        block_im = out_im[cfgs]
+        block_re[...] = data_re
+        block_im[...] = data_im
+        # per config parameters as (configs,1,1,1) to broadcast against the butterfly halves
+        cfg_shape = (block_re.shape[0],1,1,1)
+        for stage_num,idxlog2 in enumerate(idxlog2range):
+            sat_stats = None if stats is None else np.zeros((block_re.shape[0],4),dtype=np.int64)
+            fft_stage_int(block_re,block_im,int(idxlog2),g_twiddle_width,g_do_rounding[cfgs].reshape(cfg_shape),g_do_saturation[cfgs].reshape(cfg_shape),
+                          g_output_width[cfgs,idxlog2-1].reshape(cfg_shape),g_bits_to_round_off[cfgs,idxlog2-1].reshape(cfg_shape),g_do_dif,sat_stats)
+            if stats is not None:
+                for cfg,cfg_stats in zip(range(cfgs.start,cfgs.stop),sat_stats):
+                    stats[cfg].counts[stage_num] = cfg_stats
+        if g_do_bit_rev_output==1:
+            block_re[...] = bitrevorder(block_re)
+            block_im[...] = bitrevorder(block_im)
+    out_re = out_re.reshape((nof_configs,)+out_shape)
+    out_im = out_im.reshape((nof_configs,)+out_shape)
+    if return_stats:
+        return out_re,out_im,stats
+    return out_re,out_im
+
+def _stream_chunks(source,chunk_samples,file_dtype):
+    # Yield re,im arrays from an iterator of chunks (complex arrays or re,im tuples) or from a binary
+    # file handle of interleaved re,im integers of file_dtype. The file is read into one reused buffer.
+    if hasattr(source,'readinto'):
+        raw = np.empty(2*chunk_samples,dtype=file_dtype)
+        raw_bytes = memoryview(raw).cast('B')
+        while True:
+            nof_bytes = 0
+            while nof_bytes<raw_bytes.nbytes:
+                n = source.readinto(raw_bytes[nof_bytes:])
+                if not n:
+                    break
+                nof_bytes += n
+            nof_samples = nof_bytes//(2*raw.itemsize)
+            if nof_samples>0:
+                yield raw[0:2*nof_samples:2],raw[1:2*nof_samples:2]
+            if nof_bytes<raw_bytes.nbytes:
+                return
+    else:
+        for chunk in source:
+            if isinstance(chunk,tuple):
+                yield np.asarray(chunk[0]).reshape(-1),np.asarray(chunk[1]).reshape(-1)
+            else:
+                chunk = np.asarray(chunk).reshape(-1)
+                yield np.real(chunk),np.imag(chunk)
+
+def pfft_stream(source,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,frames_per_block=64,file_dtype=np.int32,stats=None):
+    # Generator version of pfft_int for captures of any length.
+    # source is an iterator of chunks of any size (complex arrays of integer values or re,im tuples)
+    # or a binary file handle positioned at interleaved re,im samples of file_dtype.
+    # Input is gathered into blocks of frames_per_block frames and each block yields a tuple of
+    # (frames x fftsize) int64 re,im arrays, the last block may hold fewer frames and samples after
+    # the last whole frame are dropped.
+    # The buffers are reused, so the yielded arrays are only valid until the next block is requested,
+    # copy them if you need to keep them. Memory use stays flat whatever the capture length.
+    # stats is an optional FftStats (see make_fft_stats) accumulated over the whole stream.
+    fftsize = 2**fftsize_log2
+    capacity = frames_per_block*fftsize
+    buf_re = np.empty((frames_per_block,fftsize),dtype=np.int64)
+    buf_im = np.empty((frames_per_block,fftsize),dtype=np.int64)
+    if g_do_bit_rev_input==1 or g_do_bit_rev_output==1:
+        # second pair of buffers to bit reverse into
+        alt_re = np.empty((frames_per_block,fftsize),dtype=np.int64)
+        alt_im = np.empty((frames_per_block,fftsize),dtype=np.int64)
+        bitrev_idx = bit_reverse_indices(fftsize_log2)
+
+    def process_block(nof_frames):
+        data_re,data_im = buf_re[0:nof_frames],buf_im[0:nof_frames]
+        if g_do_bit_rev_input==1:
+            np.take(data_re,bitrev_idx,axis=1,out=alt_re[0:nof_frames])
+            np.take(data_im,bitrev_idx,axis=1,out=alt_im[0:nof_frames])
+            data_re,data_im = alt_re[0:nof_frames],alt_im[0:nof_frames]
+        pfft_int_frames(data_re,data_im,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,0,0,None,stats)
+        if g_do_bit_rev_output==1:
+            if g_do_bit_rev_input==1:
+                out_re,out_im = buf_re[0:nof_frames],buf_im[0:nof_frames]
+            else:
+                out_re,out_im = alt_re[0:nof_frames],alt_im[0:nof_frames]
+            np.take(data_re,bitrev_idx,axis=1,out=out_re)
+            np.take(data_im,bitrev_idx,axis=1,out=out_im)
+            data_re,data_im = out_re,out_im
+        return data_re,data_im
+
+    fill = 0
+    flat_re = buf_re.reshape(-1)
+    flat_im = buf_im.reshape(-1)
+    for chunk_re,chunk_im in _stream_chunks(source,capacity,file_dtype):
+        pos = 0
+        while pos<chunk_re.size:
+            n = min(capacity-fill,chunk_re.size-pos)
+            flat_re[fill:fill+n] = chunk_re[pos:pos+n]
+            flat_im[fill:fill+n] = chunk_im[pos:pos+n]
+            fill += n
+            pos += n
+            if fill==capacity:
+                yield process_block(frames_per_block)
+                fill = 0
+    if fill>=fftsize:
+        yield process_block(fill//fftsize)
+
+def _pfft_shard_worker(shm_re_name,shm_im_name,shape,frame_start,frame_stop,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,want_stats):
+    # Pool worker for pfft_parallel: attach to the shared input/output arrays and run the integer engine
+    # in place on frames frame_start:frame_stop. Only the stats counts (if any) go back through pickle.
+    from multiprocessing import shared_memory
+    shm_re = shared_memory.SharedMemory(name=shm_re_name)
+    shm_im = shared_memory.SharedMemory(name=shm_im_name)
+    try:
+        data_re = np.ndarray(shape,dtype=np.int64,buffer=shm_re.buf)[frame_start:frame_stop]
+        data_im = np.ndarray(shape,dtype=np.int64,buffer=shm_im.buf)[frame_start:frame_stop]
+        stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if want_stats else None
+        out_re,out_im = pfft_int_frames(data_re,data_im,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,None,stats)
+        if out_re is not data_re:
+            data_re[...] = out_re
+            data_im[...] = out_im
+        del data_re,data_im,out_re,out_im
+    finally:
+        shm_re.close()
+        shm_im.close()
+    return None if stats is None else stats.counts
+
+def pfft_parallel(data,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,nof_workers=None,frames_per_shard=None,return_stats=False):
+    # Frames are independent, so shard them over a process pool. data is as for pfft_int (1D) or
+    # pfft_batch (last axis is the FFT size), complex with integer values or a re,im tuple.
+    # The frames are put in shared memory once and every worker processes its shard in place, so
+    # the large arrays are never pickled. The output is bit identical to pfft_int/pfft_batch and
+    # has the same shape as the input (1D input is cut to whole frames).
+    # nof_workers defaults to os.cpu_count(), frames_per_shard to about 4 shards per worker.
+    fftsize = 2**fftsize_log2
+    data_re,data_im = _split_re_im(data)
+    out_shape = data_re.shape
+    if data_re.ndim==1:
+        nof_frames = data_re.size//fftsize
+        data_re = data_re[0:nof_frames*fftsize]
+        data_im = data_im[0:nof_frames*fftsize]
+        out_shape = data_re.shape
+    shape = (data_re.size//fftsize,fftsize)
+    if nof_workers is None:
+        nof_workers = os.cpu_count() or 1
+    if frames_per_shard is None:
+        frames_per_shard = max(1,-(-shape[0]//(4*nof_workers)))
+    stats = make_fft_stats(fftsize_log2,g_output_width,g_do_dif) if return_stats else None
+    fft_args = (fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,np.asarray(g_output_width),np.asarray(g_bits_to_round_off),g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output)
+    if nof_workers<=1 or shape[0]<=frames_per_shard:
+        out_re,out_im = pfft_int_frames(data_re.reshape(shape),data_im.reshape(shape),*fft_args,None,stats)
+    else:
+        import concurrent.futures
+        from multiprocessing import shared_memory
+        shm_re = shared_memory.SharedMemory(create=True,size=max(1,data_re.nbytes))
+        shm_im = shared_memory.SharedMemory(create=True,size=max(1,data_im.nbytes))
+        try:
+            shared_re = np.ndarray(shape,dtype=np.int64,buffer=shm_re.buf)
+            shared_im = np.ndarray(shape,dtype=np.int64,buffer=shm_im.buf)
+            shared_re[...] = data_re.reshape(shape)
+            shared_im[...] = data_im.reshape(shape)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=nof_workers) as pool:
+                jobs = [pool.submit(_pfft_shard_worker,shm_re.name,shm_im.name,shape,frame_start,min(frame_start+frames_per_shard,shape[0]),*fft_args,return_stats)
+                        for frame_start in range(0,shape[0],frames_per_shard)]
+                for job in jobs:
+                    counts = job.result()
+                    if stats is not None:
+                        shard_stats = FftStats(stats.output_width)
+                        shard_stats.counts[...] = counts
+                        stats.merge(shard_stats)
+            out_re = shared_re.copy()
+            out_im = shared_im.copy()
+            del shared_re,shared_im
+        finally:
+            shm_re.close()
+            shm_re.unlink()
+            shm_im.close()
+            shm_im.unlink()
+    if return_stats:
+        return out_re.reshape(out_shape),out_im.reshape(out_shape),stats
+    return out_re.reshape(out_shape),out_im.reshape(out_shape)
+
+def _memmap_frames(input_data,output_file,fftsize_log2,frames_fn,input_dtype,input_offset,output_dtype,frames_per_chunk,progress):
+    # Chunk loop of pfft_memmap/rtwosdf_memmap: frames_fn(data_re,data_im) -> re,im runs on
+    # (frames x fftsize) int64 blocks of frames_per_chunk frames.
+    fftsize = 2**fftsize_log2
+    if isinstance(input_data,(str,Path)):
+        input_data = np.memmap(input_data,dtype=input_dtype,mode='r',offset=input_offset)
+    input_data = input_data.reshape(-1)
+    nof_frames = input_data.size//(2*fftsize)
+    output = np.memmap(output_file,dtype=output_dtype,mode='w+',shape=(max(1,2*nof_frames*fftsize),))
+    for frame_start in range(0,nof_frames,frames_per_chunk):
+        frame_stop = min(frame_start+frames_per_chunk,nof_frames)
+        chunk = input_data[2*frame_start*fftsize:2*frame_stop*fftsize]
+        data_re = chunk[0::2].astype(np.int64).reshape(frame_stop-frame_start,fftsize)
+        data_im = chunk[1::2].astype(np.int64).reshape(frame_stop-frame_start,fftsize)
+        data_re,data_im = frames_fn(data_re,data_im)
+        output[2*frame_start*fftsize:2*frame_stop*fftsize:2] = data_re.reshape(-1)
+        output[2*frame_start*fftsize+1:2*frame_stop*fftsize:2] = data_im.reshape(-1)
+        if progress is not None:
+            progress(frame_stop,nof_frames)
+    output.flush()
+    return output[0:2*nof_frames*fftsize]
+
+def pfft_memmap(input_data,output_file,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,input_dtype=np.int32,input_offset=0,output_dtype=np.int32,frames_per_chunk=256,progress=None,stats=None):
+    # Out of core version of pfft_int for captures larger than RAM.
+    # input_data is the path of a raw file of interleaved re,im integers of input_dtype (starting
+    # input_offset bytes in, eg after a header) or an already open np.memmap/array of interleaved re,im.
+    # The output is written to output_file as interleaved re,im output_dtype integers through a memmap,
+    # frames_per_chunk frames at a time, so only one chunk is ever in memory.
+    # progress is an optional callable, called as progress(frames_done,nof_frames) after every chunk.
+    # stats is an optional FftStats (see make_fft_stats) to accumulate into.
+    # Returns the output np.memmap (1D interleaved re,im), samples after the last whole frame are dropped.
+    if np.max(g_output_width)>8*np.dtype(output_dtype).itemsize:
+        raise ValueError('output_dtype is too narrow for g_output_width')
+    def frames_fn(data_re,data_im):
+        return pfft_int_frames(data_re,data_im,fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,g_do_dif,g_do_bit_rev_input,g_do_bit_rev_output,None,stats)
+    return _memmap_frames(input_data,output_file,fftsize_log2,frames_fn,input_dtype,input_offset,output_dtype,frames_per_chunk,progress)
+
+def rtwosdf_memmap(input_data,output_file,g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_twiddle_width,g_do_rounding,g_do_saturation,g_bits_to_round_off,g_use_reorder,g_guard_enable=True,input_dtype=np.int32,input_offset=0,frames_per_chunk=256,progress=None,stats=None):
+    # Out of core version of rtwosdf_int, input_data, output_file and the chunking as for pfft_memmap.
+    # The output is int32 (g_out_dat_w <= 32 as in the testbenches).
+    in_scale_w,g_output_width,out_scale_w = fft_stage_widths(g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_guard_enable)
+    if g_out_dat_w>32:
+        raise ValueError('rtwosdf_memmap writes int32, g_out_dat_w must be <= 32')
+    def frames_fn(data_re,data_im):
+        np.left_shift(data_re,in_scale_w,out=data_re)
+        np.left_shift(data_im,in_scale_w,out=data_im)
+        data_re,data_im = pfft_int_frames(data_re,data_im,g_fftsize_log2,g_twiddle_width,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,1,0,1 if g_use_reorder else 0,None,stats)
+        requantize_int(data_re,out_scale_w,g_out_dat_w,g_do_rounding,g_do_saturation)
+        requantize_int(data_im,out_scale_w,g_out_dat_w,g_do_rounding,g_do_saturation)
+        return data_re,data_im
+    return _memmap_frames(input_data,output_file,g_fftsize_log2,frames_fn,input_dtype,input_offset,np.int32,frames_per_chunk,progress)
+
+#-------------------------------------
+#-- Output comparison
+#-- fft_diff compares a simulator output against the model chunk by chunk, so memmapped outputs of
+#-- any size are never copied whole, and says where they differ instead of just yes/no.
+#-------------------------------------
+class FftDiff:
+    # Result of fft_diff. A sample mismatches when its real or imaginary error is above tolerance.
+    #   first_mismatch  - (frame,bin) of the first mismatch, None when there is none
+    #   frame_mismatches/bin_mismatches - number of mismatches in every frame / every bin
+    #   error_hist      - number of samples per error magnitude in lsbs (max of re,im), the last
+    #                     entry counts everything from len(error_hist)-1 up
+    #   max_error       - largest error magnitude in lsbs
+    def __init__(self,nof_frames,fftsize,tolerance=0,hist_size=17):
+        self.fftsize = fftsize
+        self.tolerance = tolerance
+        self.first_mismatch = None
+        self.frame_mismatches = np.zeros(nof_frames,dtype=np.int64)
+        self.bin_mismatches = np.zeros(fftsize,dtype=np.int64)
+        self.error_hist = np.zeros(hist_size,dtype=np.int64)
+        self.max_error = 0
+
+    @property
+    def nof_mismatches(self):
+        return int(self.bin_mismatches.sum())
+
+    @property
+    def passed(self):
+        return self.first_mismatch is None
+
+    def add(self,sample_start,error):
+        # error is the error magnitude of the samples from sample_start on
+        if error.size==0:
+            return self
+        self.max_error = max(self.max_error,int(error.max()))
+        self.error_hist += np.bincount(np.minimum(error,self.error_hist.size-1),minlength=self.error_hist.size)
+        mismatch = np.flatnonzero(error>self.tolerance)
+        if mismatch.size>0:
+            mismatch += sample_start
+            if self.first_mismatch is None:
+                self.first_mismatch = divmod(int(mismatch[0]),self.fftsize)
+            frame_start = sample_start//self.fftsize
+            frame_counts = np.bincount(mismatch//self.fftsize-frame_start)
+            self.frame_mismatches[frame_start:frame_start+frame_counts.size] += frame_counts
+            self.bin_mismatches += np.bincount(mismatch%self.fftsize,minlength=self.fftsize)
+        return self
+
+    def __repr__(self):
+        if self.passed:
+            return "No mismatches (tolerance %d lsb, max error %d lsb)" % (self.tolerance,self.max_error)
+        lines = ["%d mismatches (tolerance %d lsb), first at frame %d bin %d, max error %d lsb" % (self.nof_mismatches,self.tolerance,self.first_mismatch[0],self.first_mismatch[1],self.max_error)]
+        bad_frames = np.flatnonzero(self.frame_mismatches)
+        lines.append("%d of %d frames differ, worst: %s" % (bad_frames.size,self.frame_mismatches.size,
+                     ", ".join("%d (%d)" % (frame,self.frame_mismatches[frame]) for frame in bad_frames[np.argsort(-self.frame_mismatches[bad_frames],kind='stable')][0:5])))
+        bad_bins = np.flatnonzero(self.bin_mismatches)
+        lines.append("%d of %d bins differ, worst: %s" % (bad_bins.size,self.fftsize,
+                     ", ".join("%d (%d)" % (fft_bin,self.bin_mismatches[fft_bin]) for fft_bin in bad_bins[np.argsort(-self.bin_mismatches[bad_bins],kind='stable')][0:5])))
+        lines.append("error lsb: " + " ".join("%d:%d" % (lsb,count) for lsb,count in enumerate(self.error_hist) if count>0))
+        return "\n".join(lines)
+
+def _re_im_views(data):
+    # re,im tuple, complex array or 1D interleaved re,im array (as the output files and pfft_memmap)
+    # -> 1D re,im views, so memmaps are not read here
+    if isinstance(data,tuple):
+        return np.reshape(data[0],-1),np.reshape(data[1],-1)
+    if np.iscomplexobj(data):
+        return np.real(data).reshape(-1),np.imag(data).reshape(-1)
+    data = np.reshape(data,-1)
+    return data[0::2],data[1::2]
+
+def fft_diff(expected,actual,fftsize_log2,tolerance=0,frames_per_chunk=256):
+    # Compare actual (eg the simulator output) against expected (the model) with a +/-tolerance lsb
+    # margin on the real and imaginary parts. Both are re,im tuples, complex arrays or 1D interleaved
+    # re,im arrays (an np.memmap works, it is read frames_per_chunk frames at a time).
+    # Returns a FftDiff, frames and bins are counted in blocks of 2**fftsize_log2 output samples.
+    exp_re,exp_im = _re_im_views(expected)
+    act_re,act_im = _re_im_views(actual)
+    if exp_re.size!=act_re.size:
+        raise ValueError('expected has %d samples and actual %d' % (exp_re.size,act_re.size))
+    fftsize = 2**fftsize_log2
+    diff = FftDiff(-(-exp_re.size//fftsize),fftsize,tolerance)
+    chunk_size = frames_per_chunk*fftsize
+    for start in range(0,exp_re.size,chunk_size):
+        stop = min(start+chunk_size,exp_re.size)
+        error = np.abs(np.subtract(act_re[start:stop],exp_re[start:stop],dtype=np.int64,casting="unsafe"))
+        np.maximum(error,np.abs(np.subtract(act_im[start:stop],exp_im[start:stop],dtype=np.int64,casting="unsafe")),out=error)
+        diff.add(start,error)
+    return diff
+
+#-------------------------------------
+#-- Testbench data files
+#-- The vfmodel testbenches exchange an 8 word header
+#--   fftsize, data width, number of complex samples, scale_sched, 0, 0, 0, FFT_FILE_MAGIC
+#-- followed by interleaved re,im integers. A .txt file has one integer per line, a .bin file the same
+#-- integers as raw native int32 words (a VHDL `file of integer`, g_binary_io in the testbenches),
+#-- which is read back through a memmap. Text output files have no header, binary ones do.
+#-------------------------------------
+FFT_FILE_MAGIC = 2122219905 # 0x7E7E8181
+FFT_FILE_HEADER_W = 8
+
+def fft_file_header(fftsize_log2,dat_w,nof_samples,scale_sched):
+    header = np.zeros(FFT_FILE_HEADER_W,dtype=np.int32)
+    header[0] = 2**fftsize_log2
+    header[1] = dat_w
+    header[2] = nof_samples
+    header[3] = scale_sched
+    header[7] = FFT_FILE_MAGIC
+    return header
+
+def write_fft_file(path,header,data_re,data_im):
+    # Write header and the interleaved re,im data, binary when path ends in .bin, else text
+    data_re = np.reshape(data_re,-1)
+    nof_words = FFT_FILE_HEADER_W+2*data_re.size
+    if Path(path).suffix=='.bin':
+        words = np.memmap(path,dtype=np.int32,mode='w+',shape=(nof_words,))
+    else:
+        words = np.zeros(nof_words,dtype=np.int64)
+    words[0:FFT_FILE_HEADER_W] = header
+    words[FFT_FILE_HEADER_W::2] = data_re
+    words[FFT_FILE_HEADER_W+1::2] = np.reshape(data_im,-1)
+    if isinstance(words,np.memmap):
+        words.flush()
+    else:
+        _common_pkg_py["write_int_text"](path,words)
+
+def read_fft_file(path,has_header=True,header_only=False):
+    # Returns header,data with data the interleaved re,im words after the header, a read only memmap
+    # for .bin files. header is None when has_header is False or the file is shorter than a header.
+    # header_only skips reading the data of a text file.
+    if Path(path).suffix=='.bin':
+        nof_words = os.path.getsize(path)//4
+        words = np.memmap(path,dtype=np.int32,mode='r',shape=(nof_words,)) if nof_words>0 else np.zeros(0,dtype=np.int32)
+    else:
+        words = np.loadtxt(path,dtype=np.int64,ndmin=1,max_rows=FFT_FILE_HEADER_W if (has_header and header_only) else None)
+    if not has_header:
+        return None,words
+    if words.size<FFT_FILE_HEADER_W:
+        return None,words[0:0]
+    return np.array(words[0:FFT_FILE_HEADER_W],dtype=np.int64),words[FFT_FILE_HEADER_W:]
+
+#-------------------------------------
+#-- Background golden output
+#-- The simulator runs as a separate process, so the model output a post check compares against can
+#-- be computed in a thread while the simulation runs. pre_config starts it with start_golden and
+#-- post_check collects it with take_golden, the two are matched up by the test output path.
+#-- VUnit skips post_check for a failed or interrupted simulation, so the jobs nobody collects are
+#-- dropped: when their output path is reused and beyond GOLDEN_MAX_PENDING (oldest first). A dropped
+#-- golden is just computed again by post_check. The pool is small, VUnit -p already runs
+#-- simulations in parallel.
+#-------------------------------------
+GOLDEN_MAX_WORKERS = 2
+GOLDEN_MAX_PENDING = 8
+_golden_jobs = {}
+_golden_pool = None
+
+def _golden_key(output_path):
+    return str(Path(output_path).resolve())
+
+def stop_golden():
+    # Drop all jobs and shut the pool down (also run at exit)
+    global _golden_pool
+    while _golden_jobs:
+        _golden_jobs.popitem()[1].cancel()
+    if _golden_pool is not None:
+        _golden_pool.shutdown(wait=False,cancel_futures=True)
+        _golden_pool = None
+
+def start_golden(output_path,golden,*args):
+    # Run golden(*args) in the background for the test writing to output_path
+    global _golden_pool
+    if _golden_pool is None:
+        import concurrent.futures
+        import atexit
+        _golden_pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(GOLDEN_MAX_WORKERS,os.cpu_count() or 1))
+        atexit.register(stop_golden)
+    key = _golden_key(output_path)
+    stale = _golden_jobs.pop(key,None)
+    if stale is not None:
+        stale.cancel()
+    while len(_golden_jobs)>=GOLDEN_MAX_PENDING:
+        _golden_jobs.pop(next(iter(_golden_jobs))).cancel()
+    _golden_jobs[key] = _golden_pool.submit(golden,*args)
+
+def take_golden(output_path,timeout=None):
+    # Wait for and return the result of the golden started for output_path, None if none was started
+    # (or it was dropped). An exception of the golden is raised here.
+    job = _golden_jobs.pop(_golden_key(output_path),None)
+    return None if job is None else job.result(timeout)
+
+#-------------------------------------
+#-- Scale schedule search
+#-- A schedule is the scale_sched word of the testbenches, bit stage-1 set scales stage `stage` by 2.
+#-- The DIF stages are walked in processing order as a tree, every node is a prefix of the schedule
+#-- run through the integer engine. A branch is pruned at the first stage that saturates, and
+#-- per number of shifts so far only the beam_width prefixes closest to the ideal are kept. The SNR
+#-- is against the same stages done in float with the same (quantised) twiddles, so it measures the
+#-- data path rounding only.
+#-------------------------------------
+def make_signal_ensemble(g_fftsize_log2,nof_frames,g_in_dat_w,tone_bins=(),tone_amp=0.25,noise_rms=0.01,nof_rfi_bursts=0,rfi_amp=0.9,rfi_len=64,seed=None):
+    # Test ensemble for scale_sched_search: tones on (possibly fractional) bins plus complex gaussian
+    # noise plus short broadband bursts. The amplitudes are fractions of the input full scale.
+    # Returns a (nof_frames x fftsize) complex array of g_in_dat_w integers (rounded and saturated).
+    rng = np.random.default_rng(seed)
+    fftsize = 2**g_fftsize_log2
+    full_scale = 2**(g_in_dat_w-1)
+    t = np.arange(nof_frames*fftsize)
+    data = np.zeros(t.size,dtype=np.complex128)
+    for tone_bin in tone_bins:
+        data += tone_amp*np.exp(2j*np.pi*(tone_bin/fftsize*t+rng.random()))
+    data += noise_rms*(rng.standard_normal(t.size)+1j*rng.standard_normal(t.size))/np.sqrt(2)
+    for burst_start in rng.integers(0,max(1,t.size-rfi_len),nof_rfi_bursts):
+        data[burst_start:burst_start+rfi_len] += rfi_amp*np.exp(2j*np.pi*rng.random(rfi_len))
+    data_re = np.rint(data.real*full_scale).astype(np.int64)
+    data_im = np.rint(data.imag*full_scale).astype(np.int64)
+    roundsat_int(data_re,0,g_in_dat_w,0,1)
+    roundsat_int(data_im,0,g_in_dat_w,0,1)
+    return (data_re+1j*data_im).reshape(nof_frames,fftsize)
+
+def _dif_stage_float(data,fft_size_log2,g_twiddle_width):
+    # Float DIF stage with the block layout and twiddles of fft_stage_int, in place on complex data
+    half = 2**(fft_size_log2-1)
+    tw_re,tw_im = twiddle_gen_int(half,g_twiddle_width,1,1,1)
+    blocks = data.reshape(data.shape[:-1]+(data.shape[-1]//(2*half),2,half))
+    diff = blocks[...,0,:]-blocks[...,1,:]
+    blocks[...,0,:] += blocks[...,1,:]
+    blocks[...,1,:] = diff*((tw_re+1j*tw_im)/2**(g_twiddle_width-1))
+    return data
+
+def _snr_db(data_re,data_im,ideal,nof_shifts):
+    ref = ideal*2.0**-nof_shifts
+    noise = np.sum(np.abs(data_re-ref.real)**2+np.abs(data_im-ref.imag)**2)
+    signal = np.sum(np.abs(ref)**2)
+    if noise==0:
+        return np.inf
+    return 10*np.log10(signal/noise)
+
+def _sched_search_subtree(data_re,data_im,prefix,g_fftsize_log2,g_out_dat_w,g_twiddle_width,g_do_rounding,g_output_width,in_scale_w,out_scale_w,beam_width,candidates):
+    # Beam search below the fixed prefix (bits of the first processed stages, stage g_fftsize_log2
+    # first). Returns a dict of schedule -> SNR in dB of the schedules that never saturate.
+    ideal = np.left_shift(data_re,in_scale_w)+1j*np.left_shift(data_im,in_scale_w)
+    # nodes are (schedule so far,nof shifts,re,im)
+    nodes = [(0,0,np.left_shift(data_re,in_scale_w),np.left_shift(data_im,in_scale_w))]
+    for stage_num,stage in enumerate(range(g_fftsize_log2,0,-1)):
+        width = int(g_output_width[stage-1])
+        bits = (prefix[stage_num],) if stage_num<len(prefix) else (0,1)
+        children = collections.defaultdict(list)
+        for sched,nof_shifts,node_re,node_im in nodes:
+            for bit in bits:
+                child_sched = sched | (bit<<(stage-1))
+                if candidates is not None and not any((cand>>(stage-1))==(child_sched>>(stage-1)) for cand in candidates):
+                    continue
+                sat_stats = np.zeros(4,dtype=np.int64)
+                child_re,child_im = fft_stage_int(node_re.copy(),node_im.copy(),stage,g_twiddle_width,g_do_rounding,1,width,bit,1,sat_stats)
+                if sat_stats[0]+sat_stats[1]>0:
+                    continue
+                children[nof_shifts+bit].append((child_sched,nof_shifts+bit,child_re,child_im))
+        _dif_stage_float(ideal,stage,g_twiddle_width)
+        nodes = []
+        for level_nodes in children.values():
+            if beam_width is not None and len(level_nodes)>beam_width:
+                level_nodes.sort(key=lambda node: -_snr_db(node[2],node[3],ideal,node[1]))
+                level_nodes = level_nodes[0:beam_width]
+            nodes.extend(level_nodes)
+    results = {}
+    for sched,nof_shifts,node_re,node_im in nodes:
+        sat_stats = np.zeros(4,dtype=np.int64)
+        # no clipping needed, a schedule that would saturate here is dropped
+        requantize_int(node_re,out_scale_w,g_out_dat_w,g_do_rounding,0)
+        requantize_int(node_im,out_scale_w,g_out_dat_w,g_do_rounding,0)
+        update_sat_stats(sat_stats,node_re,(1<<(g_out_dat_w-1))-1,-(1<<(g_out_dat_w-1)))
+        update_sat_stats(sat_stats,node_im,(1<<(g_out_dat_w-1))-1,-(1<<(g_out_dat_w-1)))
+        if sat_stats[0]+sat_stats[1]>0:
+            continue
+        results[sched] = _snr_db(node_re,node_im,ideal,nof_shifts+out_scale_w)
+    return results
+
+def _sched_search_worker(shm_re_name,shm_im_name,shape,prefix,search_args):
+    # Pool worker for scale_sched_search, searches the subtree below prefix on the shared ensemble
+    from multiprocessing import shared_memory
+    shm_re = shared_memory.SharedMemory(name=shm_re_name)
+    shm_im = shared_memory.SharedMemory(name=shm_im_name)
+    try:
+        data_re = np.ndarray(shape,dtype=np.int64,buffer=shm_re.buf).copy()
+        data_im = np.ndarray(shape,dtype=np.int64,buffer=shm_im.buf).copy()
+    finally:
+        shm_re.close()
+        shm_im.close()
+    return _sched_search_subtree(data_re,data_im,prefix,*search_args)
+
+def scale_sched_search(data,g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_twiddle_width,g_do_rounding=1,g_guard_enable=True,beam_width=8,candidates=None,nof_workers=None,return_results=False):
+    # Find the scale schedule with the best SNR that saturates nowhere (stages or output requantize)
+    # for the ensemble data (frames x fftsize, complex integers or a re,im tuple, see make_signal_ensemble)
+    # through rTwoSDF with the given generics (widths as for rtwosdf_int).
+    # candidates optionally limits the search to a list of schedules, beam_width=None searches every
+    # schedule (2**g_fftsize_log2 of them, so only for small FFTs or a candidate list).
+    # The first processed stages are split over nof_workers processes (default os.cpu_count()).
+    # Returns scale_sched,snr_db (scale_sched is None if every schedule saturates), with
+    # return_results=True also the dict of every surviving schedule -> SNR.
+    in_scale_w,g_output_width,out_scale_w = fft_stage_widths(g_fftsize_log2,g_in_dat_w,g_out_dat_w,g_stage_dat_w,g_guard_w,g_guard_enable)
+    data_re,data_im = _split_re_im(data)
+    shape = (data_re.size//2**g_fftsize_log2,2**g_fftsize_log2)
+    data_re = data_re.reshape(-1)[0:shape[0]*shape[1]].reshape(shape)
+    data_im = data_im.reshape(-1)[0:shape[0]*shape[1]].reshape(shape)
+    if candidates is not None:
+        candidates = [int(cand) for cand in candidates]
+    search_args = (g_fftsize_log2,g_out_dat_w,g_twiddle_width,g_do_rounding,g_output_width,in_scale_w,out_scale_w,beam_width,candidates)
+    if nof_workers is None:
+        nof_workers = os.cpu_count() or 1
+    split_stages = min(g_fftsize_log2,int(np.ceil(np.log2(nof_workers)))) if nof_workers>1 else 0
+    results = {}
+    if split_stages==0:
+        results = _sched_search_subtree(data_re,data_im,(),*search_args)
+    else:
+        prefixes = [tuple((prefix>>bit_idx)&1 for bit_idx in range(split_stages)) for prefix in range(2**split_stages)]
+        import concurrent.futures
+        from multiprocessing import shared_memory
+        shm_re = shared_memory.SharedMemory(create=True,size=max(1,data_re.nbytes))
+        shm_im = shared_memory.SharedMemory(create=True,size=max(1,data_im.nbytes))
+        try:
+            np.ndarray(shape,dtype=np.int64,buffer=shm_re.buf)[...] = data_re
+            np.ndarray(shape,dtype=np.int64,buffer=shm_im.buf)[...] = data_im
+            with concurrent.futures.ProcessPoolExecutor(max_workers=nof_workers) as pool:
+                jobs = [pool.submit(_sched_search_worker,shm_re.name,shm_im.name,shape,prefix,search_args) for prefix in prefixes]
+                for job in jobs:
+                    results.update(job.result())
+        finally:
+            shm_re.close()
+            shm_re.unlink()
+            shm_im.close()
+            shm_im.unlink()
+    best_sched,best_snr = None,-np.inf
+    for sched in sorted(results):
+        if results[sched]>best_snr:
+            best_sched,best_snr = sched,results[sched]
+    if return_results:
+        return best_sched,best_snr,results
+    return best_sched,best_snr
+
+#-------------------------------------
+#-- Cycle model of rTwoSDF
+#-- Every rTwoSDFStage only moves its data on in_val (the feedback delay, the sel counter and the
+#-- valid bit delay all shift on in_val), so stage g_stage passes sample m out in the valid slot of
+#-- its input sample m+2**(g_stage-1)*2**g_nof_chan and then adds a fixed number of clocks. The
+#-- rTwoOrder pages work the same way with a whole frame. So the output valid pattern is the input
+#-- valid pattern delayed by a number of valid slots plus a number of clocks, which is just a slice
+#-- of the input valid positions.
+#-------------------------------------
+def rtwosdf_stage_latency(g_stage_lat,g_weight_lat,g_mult_lat,g_bf_lat):
+    # Clocks from in_val to out_val of one rTwoSDFStage once its feedback delay is full:
+    # butterfly output pipeline, the extra register for 2 clock weight rams, rTwoWMul and the stage pipeline
+    return g_bf_lat + (1 if g_weight_lat==2 else 0) + g_mult_lat + g_stage_lat
+
+def rtwosdf_enable_pattern(g_enable_pattern,nof_valid,seed=None):
+    # Valid mask as driven by tb_vu_rtwosdf_vfmodel for nof_valid samples, one clock of in_val and then
+    # the enable_pattern gap (1=random, 2/3/4=1/9/99 clocks, others=none). The random pattern uses numpy,
+    # it has the same statistics as the OSVVM one but not the same sequence.
+    if g_enable_pattern==1:
+        rng = np.random.default_rng(seed)
+        gaps = rng.integers(0,2,nof_valid)
+    else:
+        gaps = np.full(nof_valid,{2:1,3:9,4:99}.get(g_enable_pattern,0))
+    in_val = np.zeros(nof_valid+int(np.sum(gaps)),dtype=bool)
+    in_val[np.arange(nof_valid)+np.concatenate(([0],np.cumsum(gaps)[:-1])).astype(np.int64)] = True
+    return in_val
+
+def rtwosdf_timing(in_val,g_nof_points,g_nof_chan=0,g_use_reorder=True,g_stage_lat=1,g_weight_lat=1,g_mult_lat=4,g_bf_lat=1,g_reorder_rd_lat=1):
+    # Predicts the rTwoSDF outputs for the in_val mask (one entry per clock, from the clock after reset)
+    # The defaults are the rTwoSDF generics, tb_vu_rtwosdf_vfmodel uses g_weight_lat=2 and g_mult_lat=5.
+    # Returns out_val (mask, len(in_val)+latency_clks long), out_cycles (the clock of every output
+    # sample), latency_slots (valid input slots an input sample waits for) and latency_clks (fixed clocks
+    # on top). Output sample m comes out latency_clks after the clock of input valid m+latency_slots,
+    # so gapped input stretches the latency and the tail of the last frame needs more input to come out.
+    in_val = np.asarray(in_val,dtype=bool)
+    nof_stages = int(np.ceil(np.log2(g_nof_points)))
+    nof_channels = 2**g_nof_chan
+    latency_slots = (2**nof_stages-1)*nof_channels
+    latency_clks = nof_stages*rtwosdf_stage_latency(g_stage_lat,g_weight_lat,g_mult_lat,g_bf_lat)
+    if g_use_reorder:
+        # rTwoOrder writes a page and reads it out with the valids of the next one
+        latency_slots += g_nof_points*nof_channels
+        latency_clks += g_reorder_rd_lat
+    valid_cycles = np.flatnonzero(in_val)
+    out_cycles = valid_cycles[latency_slots:]+latency_clks
+    out_val = np.zeros(in_val.size+latency_clks,dtype=bool)
+    out_val[out_cycles] = True
+    return out_val,out_cycles,latency_slots,latency_clks
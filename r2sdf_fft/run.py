@@ -6,6 +6,7 @@ from vunit.sim_if.factory import SIMULATOR_FACTORY
 
 cli = VUnitCLI()
 cli.parser.add_argument('--twid',action = 'store_true',help = 'Run the Twiddle Tests')
+cli.parser.add_argument('--twidvhdl',action = 'store_true',help = 'With --twid, check the VHDL twiddle emulation at every size and width')
 cli.parser.add_argument('--bitaccurate',action = 'store_true',help = 'Run the bitaccurate Tests')
 args = cli.parse_args()
 vu = VUnit.from_args(args = args)
@@ -154,7 +155,7 @@ r2sdf_fft_lib.add_source_file(join(script_dir,"tb_tb_vu_rTwoSDF.vhd"))
 if args.twid:
     r2sdf_fft_lib.add_source_file(join(script_dir,"tb_vu_twiddlepkg.vhd"))
     from r2sdf_fft_py import tb_twiddle_package_setup
-    tb_twiddle_package_setup(r2sdf_fft_lib)
+    tb_twiddle_package_setup(r2sdf_fft_lib,args.twidvhdl)
 if args.bitaccurate:
     r2sdf_fft_lib.add_source_file(join(script_dir,"tb_vu_rtwosdf_vfmodel.vhd"))
     from r2sdf_fft_py import tb_vu_trwosdf_vfmodel_setup
@@ -26,6 +26,12 @@ entity tb_vu_trwosdf_vfmodel is
         g_use_round         : string                    := "ROUND"; --! = "ROUND" or "TRUNCATE" will default to TRUNCATE if invalid option used
         g_use_mult_round    : string                    := "ROUND";		--! Rounding behaviour "ROUND" or "TRUNCATE"
         g_enable_pattern    : integer                   := 0; --0=Full speed, 1=Random, 2=10 Clocks between enables, 3=100 Clock between enables
+        g_binary_io         : boolean                   := false; -- TRUE = input_data.bin/output_data.bin (raw int32), FALSE = .txt
+        -- rTwoSDF pipeline latencies, the post check gives the same ones to rtwosdf_timing
+        g_stage_lat         : integer                   := 1;
+        g_weight_lat        : integer                   := 2;
+        g_mult_lat          : integer                   := 5;
+        g_bf_lat            : integer                   := 1;
         
         -- generics for rTwoSDF
         runner_cfg : string;
@@ -41,6 +47,7 @@ architecture tb_vu_trwosdf_vfmodel_arch of tb_vu_trwosdf_vfmodel is
 
 
 constant c_fftsize          : integer := 2**g_fftsize_log2;
+type t_int_file is file of integer; -- raw 32 bit words, native byte order
 signal clk                  : std_logic;
 signal rst                  : std_logic;
 signal in_re                : std_logic_vector(g_in_dat_w - 1 downto 0);
@@ -80,11 +87,11 @@ BEGIN
             g_twid_dat_w        => g_twiddle_width,
             g_max_addr_w        => 10, -- Keep Default size to use Block Ram
             g_twid_file_stem    => "NONE", -- We don't simulate with Twiddle Files, so this should matter
-            -- Keep the default latencys
-            g_stage_lat         => 1,
-            g_weight_lat        => 2,
-            g_mult_lat          => 5,
-            g_bf_lat            => 1,
+            -- Latencies from the testbench generics (see rtwosdf_timing)
+            g_stage_lat         => g_stage_lat,
+            g_weight_lat        => g_weight_lat,
+            g_mult_lat          => g_mult_lat,
+            g_bf_lat            => g_bf_lat,
             g_bf_use_zdly       => 1,
             g_bf_in_a_zdly      => 0,
             g_bf_out_d_zdly     => 0,
@@ -125,6 +132,7 @@ BEGIN
     --variable twidQR             : REAL;
     variable line_var           : line;
     file text_file              : text;
+    file bin_file               : t_int_file;
     --file textR_file             : text;
     variable temp_number        : integer;
     variable fftsize            : integer;
@@ -155,6 +163,24 @@ BEGIN
           null; -- no clocks between enables!
       end case;
     end procedure enable_pattern;      
+    -- one word of the input file, one integer per line or one 32 bit word for g_binary_io
+    procedure read_word(variable value : out integer) is
+    begin
+      if g_binary_io then
+        read(bin_file,value);
+      else
+        readline(text_file,line_var);
+        read(line_var,value);
+      end if;
+    end procedure read_word;
+    impure function end_of_input return boolean is
+    begin
+      if g_binary_io then
+        return endfile(bin_file);
+      else
+        return endfile(text_file);
+      end if;
+    end function end_of_input;
   BEGIN
     test_runner_setup(runner, runner_cfg);
     rst     <= '1';
@@ -197,8 +223,12 @@ BEGIN
     wait until rising_edge(clk);
     wait until rising_edge(clk);
     wait until rising_edge(clk);
-    file_open(text_file,output_path & "/" & "input_data.txt",READ_MODE);
-    -- The input data, input_data.txt, has the following format
+    if g_binary_io then
+      file_open(bin_file,output_path & "/" & "input_data.bin",READ_MODE);
+    else
+      file_open(text_file,output_path & "/" & "input_data.txt",READ_MODE);
+    end if;
+    -- The input data, input_data.txt or input_data.bin, has the following format
     -- header (first 8 integers):
     -- <fftsize>
     -- <g_in_dat_w>
@@ -210,48 +240,41 @@ BEGIN
     -- 2122219905 (Magic Header End field 0x7E7E8181)
     -- folllowed 2*num_words_to_read integers.
     -- Data is in I first, then Q
+    -- input_data.bin holds the same integers as raw 32 bit words
     
     -- Read the Header into VHDL
     -- Word 0= FFTsize
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=c_fftsize,"tb_vu_rtwosdf_vfmodel: Unexpected FFTsize in input data");
     -- Word 1= g_in_dat_w (bits of data for each I and Q)
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=g_in_dat_w,"tb_vu_rtwosdf_vfmodel: Unexpected Input Data width");
     check(temp_number<=32,"tb_vu_rtwosdf_vfmodel: Testbench only supports 32 bit or less inputs!");
     -- Word 2= num_words_to_read (number of I/Q pairs
-    readline(text_file,line_var);
-    read(line_var,words_expected);
+    read_word(words_expected);
     check(words_expected>0,"tb_vu_rtwosdf_vfmodel: Data Length must be greater than 0");
     check((words_expected mod c_fftsize)=0,"tb_vu_rtwosdf_vfmodel: Length of data must be a multiple of FFTsize");
     words_expected_sig <= words_expected;
     -- word 3 = Scale Schedule
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     shiftreg  <= std_logic_vector(to_unsigned(temp_number,g_fftsize_log2));
     
     for n in 4 to 6 loop
         -- Read in the spare fields and verify = 0
-        readline(text_file,line_var);
-        read(line_var,temp_number);
+        read_word(temp_number);
         check(temp_number=0,"tb_vu_rtwosdf_vfmodel: Spare header fields must be 0");
     end loop;
     -- Word=7 Read in the magic word
-    readline(text_file,line_var);
-    read(line_var,temp_number);
+    read_word(temp_number);
     check(temp_number=2122219905,"tb_vu_rtwosdf_vfmodel: Magic word must be 0x7E7E8181");
 
     -- Read The Data
     num_words_to_read := words_expected;
     loop
-      exit when endfile(text_file);
-      readline(text_file,line_var);
-      read(line_var,temp_number);
+      exit when end_of_input;
+      read_word(temp_number);
       dataI       := to_signed(temp_number,g_in_dat_w);
-      readline(text_file,line_var);
-      read(line_var,temp_number);
+      read_word(temp_number);
       dataQ       := to_signed(temp_number,g_in_dat_w);
       in_val      <= '1';
       in_re       <= std_logic_vector(dataI);
@@ -290,27 +313,104 @@ BEGIN
   o_data_proc : process
   variable line_var           : line;
   file output_file            : text;
-  variable temp_number        : integer;
+  file output_bin             : t_int_file;
+  procedure write_word(value : integer) is
+  begin
+    if g_binary_io then
+      write(output_bin,value);
+    else
+      write(line_var,value);
+      writeline(output_file,line_var);
+    end if;
+  end procedure write_word;
   begin
     data_cnt          <= 1; -- Reset our Data counter
     wait until rising_edge(clk) and rst='0';
-    file_open(output_file,output_path & "/" & "output_data.txt",WRITE_MODE);
+    if g_binary_io then
+      file_open(output_bin,output_path & "/" & "output_data.bin",WRITE_MODE);
+    else
+      file_open(output_file,output_path & "/" & "output_data.txt",WRITE_MODE);
+    end if;
     loop
       exit when endsim='1';
       wait until falling_edge(clk) and out_val='1'; -- read data on falling clocks to avoid delta issues.
-      temp_number     := to_integer(signed(out_re));
-      write(line_var,temp_number);
-      writeline(output_file,line_var);
-      temp_number     := to_integer(signed(out_im));
-      write(line_var,temp_number);
-      writeline(output_file,line_var);
+      if g_binary_io and data_cnt=1 then
+        -- output_data.bin gets the input header layout, the input header has been read by the first output
+        write_word(c_fftsize);
+        write_word(g_out_dat_w);
+        write_word(words_expected_sig);
+        write_word(to_integer(unsigned(shiftreg)));
+        for n in 4 to 6 loop
+          write_word(0);
+        end loop;
+        write_word(2122219905);
+      end if;
+      write_word(to_integer(signed(out_re)));
+      write_word(to_integer(signed(out_im)));
       data_cnt        <= data_cnt + 1;
       exit when data_cnt>=words_expected_sig;
     end loop;
-    file_close(output_file);
+    if g_binary_io then
+      file_close(output_bin);
+    else
+      file_close(output_file);
+    end if;
     wait;
   end process o_data_proc;
 
+  -- The clock of every in_val and out_val (counted from reset) for the post check of the output timing
+  -- against the cycle model rtwosdf_timing, recorded until the last expected output.
+  valid_clocks_proc : process
+  variable line_var           : line;
+  file in_clocks_file         : text;
+  file out_clocks_file        : text;
+  file in_clocks_bin          : t_int_file;
+  file out_clocks_bin         : t_int_file;
+  variable clk_cnt            : integer;
+  variable out_cnt            : integer;
+  begin
+    clk_cnt           := 0;
+    out_cnt           := 0;
+    wait until rising_edge(clk) and rst='0';
+    if g_binary_io then
+      file_open(in_clocks_bin,output_path & "/" & "in_val_clocks.bin",WRITE_MODE);
+      file_open(out_clocks_bin,output_path & "/" & "out_val_clocks.bin",WRITE_MODE);
+    else
+      file_open(in_clocks_file,output_path & "/" & "in_val_clocks.txt",WRITE_MODE);
+      file_open(out_clocks_file,output_path & "/" & "out_val_clocks.txt",WRITE_MODE);
+    end if;
+    loop
+      wait until falling_edge(clk); -- same sampling as o_data_proc
+      if in_val='1' then
+        if g_binary_io then
+          write(in_clocks_bin,clk_cnt);
+        else
+          write(line_var,clk_cnt);
+          writeline(in_clocks_file,line_var);
+        end if;
+      end if;
+      if out_val='1' then
+        if g_binary_io then
+          write(out_clocks_bin,clk_cnt);
+        else
+          write(line_var,clk_cnt);
+          writeline(out_clocks_file,line_var);
+        end if;
+        out_cnt         := out_cnt + 1;
+      end if;
+      clk_cnt         := clk_cnt + 1;
+      exit when endsim='1' or out_cnt>=words_expected_sig;
+    end loop;
+    if g_binary_io then
+      file_close(in_clocks_bin);
+      file_close(out_clocks_bin);
+    else
+      file_close(in_clocks_file);
+      file_close(out_clocks_file);
+    end if;
+    wait;
+  end process valid_clocks_proc;
+
 --stage_data_re <= <<signal rTwoSDF_inst.data_re: t_data_arr>>;
 --stage_data_im <= <<signal rTwoSDF_inst.data_im: t_data_arr>>;
 --stage_data_val <= <<signal rTwoSDF_inst.data_val: std_logic_vector>>;   
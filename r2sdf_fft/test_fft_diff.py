@@ -0,0 +1,74 @@
+#-------------------------------------
+#-- pytest checks of fft_diff/FftDiff, the post check comparison of the r2sdf FFT model
+#-------------------------------------
+import numpy as np
+import pytest
+import r2sdf_fft_py.fft_model as fft_model
+
+def make_output(fftsize_log2,nof_frames,seed=0):
+    rng = np.random.default_rng(seed)
+    size = nof_frames*2**fftsize_log2
+    return rng.integers(-2**17,2**17,size),rng.integers(-2**17,2**17,size)
+
+def test_fft_diff_equal():
+    expected = make_output(4,5)
+    diff = fft_model.fft_diff(expected,(expected[0].copy(),expected[1].copy()),4)
+    assert diff.passed
+    assert diff.first_mismatch is None
+    assert diff.nof_mismatches==0
+    assert diff.max_error==0
+    assert diff.error_hist[0]==5*16
+    assert "No mismatches" in repr(diff)
+
+def test_fft_diff_single_mismatch():
+    expected = make_output(4,5)
+    actual = (expected[0].copy(),expected[1].copy())
+    actual[1][3*16+9] -= 4
+    diff = fft_model.fft_diff(expected,actual,4,frames_per_chunk=2)
+    assert not diff.passed
+    assert diff.first_mismatch==(3,9)
+    assert diff.nof_mismatches==1
+    assert list(np.flatnonzero(diff.frame_mismatches))==[3]
+    assert list(np.flatnonzero(diff.bin_mismatches))==[9]
+    assert diff.max_error==4
+    assert diff.error_hist[4]==1
+    assert "first at frame 3 bin 9" in repr(diff)
+
+def test_fft_diff_tolerance():
+    expected = make_output(3,4)
+    actual = (expected[0]+np.tile([0,1,-1,2,0,0,0,0],4),expected[1].copy())
+    actual[1][-1] += 20
+    diff = fft_model.fft_diff(expected,actual,3,tolerance=1)
+    # the +/-1 errors are within tolerance, the 2 lsb ones and the last sample are not
+    assert diff.first_mismatch==(0,3)
+    assert diff.nof_mismatches==4+1
+    assert list(diff.frame_mismatches)==[1,1,1,2]
+    assert diff.bin_mismatches[3]==4 and diff.bin_mismatches[7]==1
+    assert diff.max_error==20
+    assert diff.error_hist[-1]==1
+    assert fft_model.fft_diff(expected,actual,3,tolerance=20).passed
+
+def test_fft_diff_input_formats(tmp_path):
+    # re,im tuples, complex arrays, interleaved arrays and interleaved memmaps all compare the same
+    expected = make_output(5,6)
+    actual = (expected[0].copy(),expected[1].copy())
+    actual[0][2*32+17] += 3
+    actual[1][5*32+1] -= 1
+    interleaved = np.empty(2*actual[0].size,dtype=np.int32)
+    interleaved[0::2] = actual[0]
+    interleaved[1::2] = actual[1]
+    interleaved.tofile(tmp_path/"actual.bin")
+    memmap = np.memmap(tmp_path/"actual.bin",dtype=np.int32,mode="r")
+    ref = fft_model.fft_diff(expected,actual,5)
+    for expected_data,actual_data in [(expected[0]+1j*expected[1],actual),(expected,actual[0]+1j*actual[1]),(expected,interleaved),(expected,memmap)]:
+        diff = fft_model.fft_diff(expected_data,actual_data,5,frames_per_chunk=4)
+        assert diff.first_mismatch==ref.first_mismatch==(2,17)
+        assert np.array_equal(diff.frame_mismatches,ref.frame_mismatches)
+        assert np.array_equal(diff.bin_mismatches,ref.bin_mismatches)
+        assert np.array_equal(diff.error_hist,ref.error_hist)
+        assert diff.max_error==3
+
+def test_fft_diff_length_mismatch():
+    expected = make_output(3,2)
+    with pytest.raises(ValueError):
+        fft_model.fft_diff(expected,(expected[0][0:-8],expected[1][0:-8]),3)
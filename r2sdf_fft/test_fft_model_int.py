@@ -0,0 +1,55 @@
+#-------------------------------------
+#-- pytest checks of the bit reversal and the int64 engine of the r2sdf FFT model
+#-- pfft_int must be bit identical to the float model pfft.
+#-------------------------------------
+import numpy as np
+import pytest
+import r2sdf_fft_py.fft_model as fft_model
+
+def bit_reverse_loop(i,fftsize_log2):
+    rev = 0
+    for bit in range(0,fftsize_log2):
+        rev |= ((i >> bit) & 1) << (fftsize_log2-1-bit)
+    return rev
+
+@pytest.mark.parametrize("fftsize_log2",[0,1,2,5,10])
+def test_bit_reverse_indices(fftsize_log2):
+    indexs = fft_model.bit_reverse_indices(fftsize_log2)
+    assert list(indexs)==[bit_reverse_loop(i,fftsize_log2) for i in range(0,2**fftsize_log2)]
+    assert not indexs.flags.writeable
+
+def test_bitrevorder_every_frame():
+    a = np.arange(4*32).reshape(4,32)
+    b = fft_model.bitrevorder(a)
+    for frame in range(0,4):
+        assert list(b[frame])==fft_model.get_bit_reversed_list_no_generator(list(a[frame]))
+        assert np.array_equal(b[frame],fft_model.bit_reverse_traverse_no_generator(a[frame]))
+
+def make_input(fftsize_log2,nof_frames,g_in_dat_w,seed):
+    rng = np.random.default_rng(seed)
+    shape = (nof_frames*2**fftsize_log2,1)
+    return rng.integers(-2**(g_in_dat_w-1),2**(g_in_dat_w-1),shape)+1j*rng.integers(-2**(g_in_dat_w-1),2**(g_in_dat_w-1),shape)
+
+@pytest.mark.parametrize("fftsize_log2",[1,4,7])
+@pytest.mark.parametrize("g_do_rounding,g_do_saturation",[(0,0),(1,0),(1,1)])
+@pytest.mark.parametrize("g_do_bit_rev_input,g_do_bit_rev_output",[(0,1),(0,0),(1,0)])
+def test_pfft_int_matches_pfft(fftsize_log2,g_do_rounding,g_do_saturation,g_do_bit_rev_input,g_do_bit_rev_output):
+    data = make_input(fftsize_log2,3,16,fftsize_log2)
+    # 16 bit outputs with a stage that doesn't round off, so the saturation is hit
+    g_output_width = np.full(fftsize_log2,16)
+    g_bits_to_round_off = np.ones(fftsize_log2,dtype=int)
+    g_bits_to_round_off[0] = 0
+    expected,_ = fft_model.pfft(data.copy(),fftsize_log2,18,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,1,g_do_bit_rev_input,g_do_bit_rev_output,stage_capture=None,return_stats=True)[0:2]
+    data_re,data_im = fft_model.pfft_int(data[:,0],fftsize_log2,18,g_do_rounding,g_do_saturation,g_output_width,g_bits_to_round_off,1,g_do_bit_rev_input,g_do_bit_rev_output)
+    assert data_re.dtype==np.int64
+    assert np.array_equal(data_re,expected[:,0].real)
+    assert np.array_equal(data_im,expected[:,0].imag)
+
+def test_pfft_int_re_im_tuple():
+    data = make_input(5,2,14,7)[:,0]
+    g_output_width = np.full(5,18)
+    g_bits_to_round_off = np.ones(5,dtype=int)
+    from_complex = fft_model.pfft_int(data,5,18,1,1,g_output_width,g_bits_to_round_off,1,0,1)
+    from_tuple = fft_model.pfft_int((data.real.astype(np.int64),data.imag.astype(np.int64)),5,18,1,1,g_output_width,g_bits_to_round_off,1,0,1)
+    assert np.array_equal(from_complex[0],from_tuple[0])
+    assert np.array_equal(from_complex[1],from_tuple[1])
@@ -0,0 +1,76 @@
+#-------------------------------------
+#-- pytest checks of the in place roundsat of the r2sdf FFT model
+#-- against the original out of place version (real and imag rounded separately).
+#-------------------------------------
+import numpy as np
+import pytest
+import r2sdf_fft_py.fft_model as fft_model
+
+def roundsat_ref(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation):
+    if np.iscomplexobj(data):
+        return roundsat_ref(np.real(data),signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation) + \
+            1j*roundsat_ref(np.imag(data),signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation)
+    if signednum==1:
+        maxpos = ((pow(2,integer_bits+fractional_bits))-1)/(2**fractional_bits)
+        maxneg = (0-(pow(2,integer_bits+fractional_bits)))/(2**fractional_bits)
+    else:
+        maxpos = ((pow(2,integer_bits+fractional_bits))-1)//(2**fractional_bits)
+        maxneg = 0
+    if g_do_rounding==1:
+        dataout = np.divide(np.around(np.multiply(data,pow(2,fractional_bits))),pow(2,fractional_bits))
+    else:
+        dataout = np.divide(np.floor(np.multiply(data,pow(2,fractional_bits))),pow(2,fractional_bits))
+    if g_do_saturation==1:
+        dataout = np.clip(dataout,maxneg,maxpos)
+    return dataout
+
+def make_data(dtype,seed):
+    # values over the full +/-2**7 range with halves of the lsb, so rounding and saturation are both hit
+    rng = np.random.default_rng(seed)
+    data = rng.integers(-2**9,2**9,(16,8))/4.0
+    if np.issubdtype(dtype,np.complexfloating):
+        data = data + 1j*rng.integers(-2**9,2**9,(16,8))/4.0
+    return data.astype(dtype)
+
+@pytest.mark.parametrize("dtype",[np.float32,np.float64,np.complex64,np.complex128])
+@pytest.mark.parametrize("signednum,integer_bits,fractional_bits",[(1,6,1),(1,7,0),(0,5,1)])
+@pytest.mark.parametrize("g_do_rounding,g_do_saturation",[(0,0),(1,0),(1,1)])
+def test_roundsat(dtype,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation):
+    data = make_data(dtype,integer_bits)
+    expected = roundsat_ref(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation)
+    result = fft_model.roundsat(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation,0)
+    assert result.dtype==data.dtype
+    assert np.array_equal(result,expected)
+    # out= a separate buffer, the input itself and a non contiguous complex view all give the same
+    out = np.empty_like(data)
+    assert fft_model.roundsat(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation,0,out=out) is out
+    assert np.array_equal(out,expected)
+    data_copy = data.copy()
+    fft_model.roundsat(data_copy[:,::2],signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation,0,out=data_copy[:,::2])
+    assert np.array_equal(data_copy[:,::2],expected[:,::2])
+    assert np.array_equal(data_copy[:,1::2],data[:,1::2])
+    assert fft_model.roundsat(data,signednum,integer_bits,fractional_bits,g_do_rounding,g_do_saturation,0,out=data) is data
+    assert np.array_equal(data,expected)
+
+def test_roundsat_integer_input():
+    data = np.arange(-300,300,7)
+    result = fft_model.roundsat(data,1,8,0,1,1,0)
+    assert result.dtype==np.float64
+    assert np.array_equal(result,np.clip(data,-256,255))
+
+def test_roundsat_nothing_to_round():
+    data = make_data(np.complex128,1)
+    assert fft_model.roundsat(data,1,0,0,1,1,0) is data
+    out = np.empty_like(data)
+    assert fft_model.roundsat(data,1,0,0,1,1,0,out=out) is out
+    assert np.array_equal(out,data)
+
+def test_roundsat_sat_stats(capsys):
+    data = make_data(np.complex128,2)
+    sat_stats = np.array([0,0,np.iinfo(np.int64).min,np.iinfo(np.int64).max],dtype=np.int64)
+    fft_model.roundsat(data,1,6,0,1,1,1,sat_stats=sat_stats)
+    rounded = np.around(np.concatenate((data.real,data.imag)))
+    assert list(sat_stats)==[np.count_nonzero(rounded>63),np.count_nonzero(rounded<-64),rounded.max(),rounded.min()]
+    printed = capsys.readouterr().out
+    assert "Saturating values to Max positive" in printed
+    assert "Saturating Values to Max negative" in printed
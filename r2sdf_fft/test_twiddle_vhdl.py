@@ -0,0 +1,87 @@
+#-------------------------------------
+#-- pytest checks of the VHDL twiddle emulation of the r2sdf FFT model
+#-- vhdl_to_sfixed is checked against a bit by bit transcription of fixed_pkg to_sfixed(real)
+#-- (common_pkg/fixed_pkg_c.vhd) in exact rational arithmetic.
+#-------------------------------------
+import math
+from fractions import Fraction
+import numpy as np
+import pytest
+import r2sdf_fft_py.fft_model as fft_model
+
+def to_sfixed_ref(value,g_twiddle_width,guard_bits=3):
+    # to_sfixed(value,0,-(g_twiddle_width-1)) with fixed_round and fixed_saturate, as an integer in lsbs
+    maxpos = (1<<(g_twiddle_width-1))-1
+    maxneg = -(1<<(g_twiddle_width-1))
+    if value>=1.0 or value<-1.0:
+        return maxpos if value>=0.0 else maxneg
+    # Xresult: abs(value) a bit at a time down to the guard bits, negated when value < 0
+    xresult = math.floor(abs(Fraction(value))*2**(g_twiddle_width-1+guard_bits))
+    if value<0.0:
+        xresult = -xresult
+    remainder = xresult & ((1<<guard_bits)-1)
+    result = xresult >> guard_bits
+    # round_fixed
+    if remainder >> (guard_bits-1):
+        rounds = (result & 1)==1 or (remainder & ((1<<(guard_bits-1))-1))!=0
+    else:
+        rounds = False
+    if rounds:
+        if result==maxpos:
+            return maxpos
+        result += 1
+    return result
+
+def boundary_values(g_twiddle_width):
+    # values on and either side of every guard bit step around a few lsbs, as well as the ends of the range
+    lsb = 2.0**-(g_twiddle_width-1)
+    values = [0.0,1.0,-1.0,1.5,-1.5,1.0-lsb/2,1.0-lsb/16,-1.0+lsb/16,-1.0-lsb/16]
+    for base in (0,1,2,7,(1<<(g_twiddle_width-1))-2):
+        for step in range(0,9):
+            for sign in (1.0,-1.0):
+                value = sign*(base+step/8.0)*lsb
+                values += [value,np.nextafter(value,np.inf),np.nextafter(value,-np.inf)]
+    return values
+
+@pytest.mark.parametrize("g_twiddle_width",[4,16,18,25])
+def test_vhdl_to_sfixed(g_twiddle_width):
+    rng = np.random.default_rng(g_twiddle_width)
+    values = np.concatenate((boundary_values(g_twiddle_width),rng.uniform(-1.0,1.0,2000),np.cos(np.pi*np.arange(0,512)/512)))
+    expected = [to_sfixed_ref(float(value),g_twiddle_width) for value in values]
+    assert list(fft_model.vhdl_to_sfixed(values,g_twiddle_width))==expected
+
+def test_vhdl_to_sfixed_differs_from_around():
+    # just over half an lsb on an even lsb: the guard bits round it down, np.around rounds it up
+    value = (2+0.5+2.0**-20)*2.0**-15
+    assert fft_model.vhdl_to_sfixed(value,16)==2
+    assert np.around(value*2**15)==3
+
+def gen_twiddle_factor_ref(k,wb_instance,stage,wb_factor,g_twiddle_width,do_ifft):
+    # twiddlesPkg.gen_twiddle_factor for a single k
+    fftsize = (2**stage)*wb_factor
+    idx = (wb_instance % fftsize) + k*wb_factor
+    sign = 1.0 if do_ifft else -1.0
+    angle = sign*math.pi*float(idx)/float(fftsize)
+    return to_sfixed_ref(math.cos(angle),g_twiddle_width),to_sfixed_ref(math.sin(angle),g_twiddle_width)
+
+@pytest.mark.parametrize("stage,wb_factor,wb_instance",[(1,1,0),(6,1,0),(4,4,3),(3,8,5)])
+@pytest.mark.parametrize("do_ifft",[False,True])
+def test_twiddle_gen_vhdl(stage,wb_factor,wb_instance,do_ifft):
+    k = np.arange(0,2**stage-(wb_instance+wb_factor-1)//wb_factor)
+    tw_re,tw_im = fft_model.twiddle_gen_vhdl(k,wb_instance,stage,wb_factor,18,do_ifft)
+    expected = [gen_twiddle_factor_ref(int(i),wb_instance,stage,wb_factor,18,do_ifft) for i in k]
+    assert list(zip(tw_re,tw_im))==expected
+
+def test_twiddle_gen_vhdl_index_check():
+    with pytest.raises(ValueError):
+        fft_model.twiddle_gen_vhdl(np.arange(0,5),0,2,1,18)
+
+@pytest.mark.parametrize("g_twiddle_width",[16,18])
+def test_twiddle_gen_int_vhdl(g_twiddle_width):
+    # the tables of every size match the emulation, whether generated or sliced from a cached larger table
+    fft_model.twiddle_cache_clear()
+    for fftsize_log2 in (9,2,5,0):
+        tw_re,tw_im = fft_model.twiddle_gen_int(2**fftsize_log2,g_twiddle_width,1,1,1)
+        expected_re,expected_im = fft_model.twiddle_gen_vhdl(np.arange(0,2**fftsize_log2),0,fftsize_log2,1,g_twiddle_width)
+        assert np.array_equal(tw_re,expected_re)
+        assert np.array_equal(tw_im,expected_im)
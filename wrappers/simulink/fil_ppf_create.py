@@ -73,6 +73,10 @@ import sys
 import getopt
 import os
 import numpy as np
+from runpy import run_path
+
+# writemem/writemif format the coefficients with common_pkg_py, run from its file as it is not installed
+common_pkg_py = run_path(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../common_pkg", "common_pkg_py", "__init__.py"))
 
 def run(argv):
     # Arguments
@@ -210,22 +214,16 @@ def run(argv):
                 kk = k
 
             for j in range(pfir.nof_taps):
-                coefs_tmp = []
+                # points i*wb_factor+kk of tap j, use kk
+                s = pfir_coefs_flip[j*pfir.nof_points+kk:(j+1)*pfir.nof_points:pfir.wb_factor][:pfir.file_nof_points]
                 # append MEM index in range(c_nof_files)
                 if pfir.gen_files:
                     t_outfilename = pfir.outfileprefix + '_%dwb' % pfir.wb_factor + \
                         '_%d.%s' % (k*pfir.nof_taps+j, pfir.ext)
                     with open(t_outfilename, 'w+') as fp:
-                        for i in range(pfir.file_nof_points):
-                            s = ('%%0%dx\n' % np.ceil(pfir.coef_w/4)) % (
-                                pfir_coefs_flip[j*pfir.nof_points+i*pfir.wb_factor+kk])  # use kk
-                            fp.write(s)
+                        common_pkg_py["write_int_text"](fp, s, 16, int(np.ceil(pfir.coef_w/4)))
                 else:
-                    for i in range(pfir.file_nof_points):
-                        s = ('%%0%dx' % np.ceil(pfir.coef_w/4)) % (
-                                pfir_coefs_flip[j*pfir.nof_points+i*pfir.wb_factor+kk])  # use kk
-                        coefs_tmp.append(s)
-                    coefs.append(",".join(coefs_tmp))
+                    coefs.append(common_pkg_py["int_text"](s[None, :], 16, int(np.ceil(pfir.coef_w/4)), ',', line_end='').decode())
         if not pfir.gen_files:
             return coefs
 
@@ -254,10 +252,9 @@ def run(argv):
                     s = 'CONTENT BEGIN\n'
                     fp.write(s)
 
-                    for i in range(pfir.file_nof_points):
-                        s = ' %x   :  %x ; \n' % (
-                            i, pfir_coefs_flip[j*pfir.nof_points+i*pfir.wb_factor+kk])  # use kk
-                        fp.write(s)
+                    # points i*wb_factor+kk of tap j, use kk
+                    s = pfir_coefs_flip[j*pfir.nof_points+kk:(j+1)*pfir.nof_points:pfir.wb_factor][:pfir.file_nof_points]
+                    common_pkg_py["write_int_text"](fp, np.stack((np.arange(s.size), s), axis=1), 16, 0, '   :  ', ' ', ' ; \n')
 
                     s = 'END;\n'
                     fp.write(s)
@@ -296,11 +293,7 @@ def run(argv):
 # Prepare coefficients for writing to bram file
 ###############################################################################################################
     # Flip the order of the coefficients per tap - needs to happen regardless of which technology we're implementing for.
-    pfir_coefs_flip = []
-    for j in range(pfir.nof_taps):
-        for i in range(pfir.nof_points):
-            pfir_coefs_flip.append(
-                pfir_coefs[j*pfir.nof_points + pfir.nof_points-1-i])
+    pfir_coefs_flip = np.asarray(pfir_coefs, dtype=np.int64).reshape(pfir.nof_taps, pfir.nof_points)[:, ::-1].reshape(-1)
 
     if pfir.ext == 'mem' and pfir.gen_files:
         writemem(pfir, pfir_coefs_flip)
@@ -24,8 +24,12 @@
 #
 import os
 from datetime import datetime
+from runpy import run_path
 import numpy as np
 
+# writeTwiddlePkg formats the twiddle map with common_pkg_py, run from its file as it is not installed
+common_pkg_py = run_path(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../common_pkg", "common_pkg_py", "__init__.py"))
+
 
 def par_twiddle_pkg_gen(Np, Nb, destfolder):
     # 'twiddle defintion'
@@ -167,18 +171,13 @@ def writeTwiddlePkg(w_re, w_im, wMap, destfolder):
                 fid.write(f'1=>b"{w_im[0]}"')
                 fid.write("\n\t);\n\n")
             else:
+                # one write per table, the bit strings are already text
                 fid.write("\tconstant wRe: wRowTyp :=\n\t(\n")
-                for index in range((Np//2)-1):
-                    fid.write("\t\t")
-                    fid.write(f'b"{w_re[index]}",')
-                    fid.write("\n")
+                fid.write("".join(f'\t\tb"{w}",\n' for w in w_re[:(Np//2)-1]))
                 fid.write(f'\t\tb"{w_re[(Np//2)-1]}"\n\t);\n\n')
 
                 fid.write("\tconstant wIm: wRowTyp :=\n\t(\n")
-                for index in range((Np//2)-1):
-                    fid.write("\t\t")
-                    fid.write(f'b"{w_im[index]}",')
-                    fid.write("\n")
+                fid.write("".join(f'\t\tb"{w}",\n' for w in w_im[:(Np//2)-1]))
                 fid.write(f'\t\tb"{w_im[(Np//2)-1]}"\n\t);\n\n')
 
         # ------------
@@ -191,18 +190,9 @@ def writeTwiddlePkg(w_re, w_im, wMap, destfolder):
                 fid.write("\t);\n")
             else:
                 fid.write("\tconstant wMap: wMapTyp :=\n\t(\n")
-                for ii in range(wMap.shape[0]):
-                    fid.write("\t\t(")
-                    for jj in range(wMap.shape[1]):
-                        if jj == wMap.shape[1]-1:
-                            fid.write(f"{int(wMap[ii, jj])}")
-                        else:
-                            fid.write(f"{int(wMap[ii, jj])},")
-
-                    if ii == wMap.shape[0]-1:
-                        fid.write(")\n")
-                    else:
-                        fid.write("),\n")
+                wMapInt = wMap.astype(np.int64)
+                common_pkg_py["write_int_text"](fid, wMapInt[:-1], delimiter=',', line_prefix='\t\t(', line_end='),\n')
+                common_pkg_py["write_int_text"](fid, wMapInt[-1:], delimiter=',', line_prefix='\t\t(', line_end=')\n')
 
                 fid.write("\t);\n\n")
 
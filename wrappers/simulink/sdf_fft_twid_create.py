@@ -7,6 +7,10 @@ import sys
 import getopt
 import os
 import numpy as np
+from runpy import run_path
+
+# writemem/writemif format the twiddles with common_pkg_py, run from its file as it is not installed
+common_pkg_py = run_path(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../common_pkg", "common_pkg_py", "__init__.py"))
 
 """
 Value must be of type integer scaled
@@ -21,6 +25,23 @@ def hexstring_bitwidth_format(value, bitwidth):
     msn = int(msn, base=16) & ((1 << bits_to_drop) -1)
     return "%x%s" % (msn, hex_str[1:])
 
+"""
+Array version of hexstring_bitwidth_format, returns the values whose ceil(bitwidth/4) digit hex is
+the string hexstring_bitwidth_format gives, for common_pkg_py.int_text.
+"""
+def hexstring_bitwidth_values(values, bitwidth):
+    ceil_nibwidth = int(np.ceil(bitwidth/4))
+    bits_to_drop = 4 - (bitwidth%4)
+    values = np.asarray(values).astype(np.uint64) & np.uint64((1 << (4*ceil_nibwidth)) - 1)
+    msn_mask = np.uint64(((1 << bits_to_drop) - 1) << (4*(ceil_nibwidth-1)))
+    return (values & np.uint64((1 << (4*(ceil_nibwidth-1))) - 1)) | (values & msn_mask)
+
+def interleave_re_im(twids_re, twids_im):
+    twids = np.empty(2*twids_re.size, dtype=np.uint64)
+    twids[0::2] = twids_re
+    twids[1::2] = twids_im
+    return twids
+
 def run(argv):
     # Arguments
     class sdf:
@@ -102,7 +123,7 @@ def run(argv):
         if not sdf.gen_files:
             ret_twids = []
         for p in range(sdf.nof_stages):
-            twids_tmp = []
+            twids_tmp = ""
             for w in range(sdf.wb_factor):
                 #Logic to scale up the coefficients to integer values for later hex conversion
                 s = gen_twiddles(sdf,p,w)
@@ -112,23 +133,16 @@ def run(argv):
                 max_pos = (1 << (sdf.coef_w-1)) - 1 
                 twids_re[twids_re > max_pos] = max_pos
                 twids_im[twids_im > max_pos] = max_pos
+                #One line per coefficient, the real then the imaginary one
+                twids = hexstring_bitwidth_values(interleave_re_im(twids_re, twids_im), sdf.coef_w)
                 if sdf.gen_files:
                     t_outfilename = sdf.outfileprefix + ("_%dp" % (sdf.nof_points//sdf.wb_factor)) + ("_%db" % (sdf.coef_w)) + ("_%dwb" % (sdf.wb_factor)) + ("_%dwbinst" % (w)) + ("_%dstg" % (p)) + ".mem" 
                     with open(t_outfilename,'w+') as fp:
-                        for i in range(twids_re.size):
-                            #Write the real coefficient line
-                            s = hexstring_bitwidth_format(twids_re[i],sdf.coef_w) +"\n"
-                            fp.write(s)
-                            #Write the imaginary coefficient line
-                            s = hexstring_bitwidth_format(twids_im[i],sdf.coef_w) +"\n"
-                            fp.write(s)
+                        common_pkg_py["write_int_text"](fp, twids, 16, int(np.ceil(sdf.coef_w/4)))
                 else:
-                    for i in range(twids_re.size):
-                        s = hexstring_bitwidth_format(twids_re[i],sdf.coef_w) +"\n"
-                        twids_tmp.append(s)
-                        s = hexstring_bitwidth_format(twids_im[i],sdf.coef_w) +"\n"
-                        twids_tmp.append(s)
-                    ret_twids.append(",".join(twids_tmp))
+                    #Every entry holds the lines of this and the previous wb instances of the stage, comma separated
+                    twids_tmp += common_pkg_py["int_text"](twids, 16, int(np.ceil(sdf.coef_w/4)), line_end="\n,").decode()
+                    ret_twids.append(twids_tmp[:-1])
                 
         if not sdf.gen_files:
             return ret_twids
@@ -163,15 +177,10 @@ def run(argv):
                         s = 'CONTENT BEGIN\n'
                         fp.write(s)
 
-                        for i in range(twids_re.size):
-                            #Write the real coefficient line
-                            s = hexstring_bitwidth_format(twids_re[i],sdf.coef_w)
-                            s = '%x   :  %s ; \n' % (i, s)
-                            fp.write(s)
-                            #Write the imaginary coefficient line
-                            s = hexstring_bitwidth_format(twids_im[i],sdf.coef_w)
-                            s = '%x   :  %s ; \n' % (i, s)
-                            fp.write(s)
+                        #The real then the imaginary coefficient line, both at address i
+                        twids = hexstring_bitwidth_values(interleave_re_im(twids_re, twids_im), sdf.coef_w)
+                        addr = np.repeat(np.arange(twids_re.size), 2)
+                        common_pkg_py["write_int_text"](fp, np.stack((addr, twids.astype(np.int64)), axis=1), 16, [0, int(np.ceil(sdf.coef_w/4))], '   :  ', '', ' ; \n')
                         s= 'END;\n'
                         fp.write(s)
                 else: